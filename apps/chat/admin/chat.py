@@ -1,17 +1,27 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 
-from apps.chat.models.chat import ChatRoom, Message, ChatResource, UserContext
+from apps.chat.models.chat import (
+    ChatRoom,
+    Message,
+    ChatResource,
+    UserContext,
+    UserFact,
+)
 
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(ModelAdmin):
-    list_display = ("id", "name", "created_at", "updated_at")
+    list_display = ("id", "name", "last_message_at", "created_at", "updated_at")
     autocomplete_fields = ("participant",)
     search_fields = ("participant__email",)
     readonly_fields = (
         "conversation_id",
         "vector_store_id",
+        "vector_store_file_count",
+        "user_message_count",
+        "ai_message_count",
+        "last_message_at",
         "created_at",
         "updated_at",
     )
@@ -29,10 +39,20 @@ class MessageAdmin(ModelAdmin):
 
 @admin.register(ChatResource)
 class ChatResourceAdmin(ModelAdmin):
-    list_display = ("id", "user", "file", "created_at")
+    list_display = ("id", "user", "file", "status", "created_at")
+    list_filter = ("status",)
     autocomplete_fields = ("user",)
     search_fields = ("file", "user__first_name")
-    readonly_fields = ("file_id", "name", "size", "type", "created_at")
+    readonly_fields = (
+        "file_id",
+        "status",
+        "name",
+        "size",
+        "type",
+        "sha256",
+        "reuse_count",
+        "created_at",
+    )
 
 
 @admin.register(UserContext)
@@ -41,3 +61,12 @@ class UserContextAdmin(ModelAdmin):
     autocomplete_fields = ("user",)
     search_fields = ("user__first_name",)
     readonly_fields = ("created_at", "data")
+
+
+@admin.register(UserFact)
+class UserFactAdmin(ModelAdmin):
+    list_display = ("id", "user", "key", "priority", "source", "expires_at")
+    list_filter = ("source",)
+    autocomplete_fields = ("user",)
+    search_fields = ("key", "user__first_name")
+    readonly_fields = ("created_at", "updated_at")
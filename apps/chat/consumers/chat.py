@@ -1,9 +1,8 @@
 import asyncio
 import json
-from typing import Optional, Union, Dict
+from typing import Any, Optional, Union, Dict
 from urllib.parse import parse_qs
 
-from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
@@ -11,16 +10,43 @@ from rest_framework_simplejwt.tokens import UntypedToken
 
 from apps.chat.enums.action import FileFormat, WSAction
 from apps.chat.enums.ws import WSType
-from apps.chat.models.chat import ChatRoom, ChatResource
+from apps.chat.models.chat import ChatRoom, ChatResource, Message
 from apps.chat.models.specializations import Specialization
 from apps.chat.services.ai import AIService
 from apps.chat.services.chat import ChatService
+from apps.chat.services.events import chat_group_name
 from apps.chat.services.file import file_service
+from apps.chat.services.persister import PendingWrite, get_message_persister
+from apps.chat.services.presence import ChatPresence
+from apps.chat.services.queue import ChatJob, ChatJobQueue
+from apps.chat.services.replay import StreamReplay
+from apps.chat.services.stream import ChunkCoalescer
+from apps.chat.services.title import (
+    claim_title,
+    generate_local_title,
+    needs_title,
+    release_title,
+)
 from apps.shared.utils.logger import logger
+from apps.shared.utils.timing import StageTimer
 from apps.users.models.users import User
 
 DEFAULT_CHUNK_SIZE = int(getattr(settings, "CHAT_CHUNK_SIZE", 512))
+DEFAULT_CHUNK_LATENCY_MS = int(getattr(settings, "CHAT_CHUNK_MAX_LATENCY_MS", 30))
 DEFAULT_TTL_DAYS = int(getattr(settings, "CHAT_DEFAULT_TTL_DAYS", 30))
+DIRECT_STREAMING = bool(getattr(settings, "CHAT_DIRECT_STREAMING", True))
+TITLE_LLM_FALLBACK = bool(getattr(settings, "CHAT_TITLE_LLM_FALLBACK", False))
+QUEUE_MAX_SIZE = int(getattr(settings, "CHAT_QUEUE_MAX_SIZE", 5))
+FILE_READY_TIMEOUT = float(getattr(settings, "CHAT_FILE_READY_TIMEOUT", 60))
+
+# Frames that belong to an answer and can be replayed after a reconnect.
+STREAM_FRAMES = {
+    WSType.AI_START,
+    WSType.AI_CHUNK,
+    WSType.AI_FILE,
+    WSType.AI_END,
+    WSType.ERROR,
+}
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -31,7 +57,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     - Fixed potential "referenced before assignment" bugs for action_type/file_format/file_ids.
     - Moved blocking I/O (file generation) off the event loop using run_in_executor.
     - More robust error handling and logging (including which user/room triggered error).
-    - Use database_sync_to_async consistently for ORM operations that are synchronous.
+    - Use the async ORM so connect and every turn take as few thread hops as possible.
     - Small refactors to keep methods focused and readable.
     """
 
@@ -42,12 +68,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.user: Union[User, AnonymousUser, None] = None
         self.chat: Optional[ChatRoom] = None
         self.specialization: Optional[Specialization] = None
+        self.has_peers: bool = True
+        self._present: bool = False
+        self._background_tasks: set = set()
+        self._closed: bool = False
+        self._replay: Optional[StreamReplay] = None
+        self._replayed: Optional[int] = None
+        # Attachments this connection was told are indexed (or failed) in the
+        # chat's vector store; set whenever a ``file_ready`` event arrives.
+        self._settled_files: set = set()
+        self._files_changed = asyncio.Event()
+        self.jobs = ChatJobQueue(
+            self._handle_message,
+            maxsize=QUEUE_MAX_SIZE,
+            on_positions=self._send_queue_positions,
+        )
         self.ai_service = AIService()
         self.chat_service = ChatService()
 
     async def connect(self) -> None:
         self.room_id = self.scope["url_route"]["kwargs"].get("room_id")
-        self.room_group_name = f"chat_{self.room_id}"
+        self.room_group_name = chat_group_name(self.room_id)
 
         self.user = await self._authenticate_user()
 
@@ -55,24 +96,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.debug("WebSocket connect rejected: anonymous user")
             return await self.close()
 
-        try:
-            self.specialization = await database_sync_to_async(
-                lambda u: getattr(u, "specialization", None)
-            )(self.user)
-        except Exception as e:
-            logger.warning(
-                f"Failed to load specialization for user {getattr(self.user, 'id', None)}: {e}"
-            )
-            self.specialization = None
+        # Loaded together with the user by _authenticate_user.
+        self.specialization = self.user.specialization
 
         if not self.specialization:
             logger.debug("WebSocket connect rejected: user has no specialization")
             return await self.close()
 
         try:
-            self.chat = await database_sync_to_async(ChatRoom.objects.get)(
-                id=self.room_id
-            )
+            self.chat = await ChatRoom.objects.aget(id=self.room_id)
         except ChatRoom.DoesNotExist:
             logger.debug(
                 f"WebSocket connect rejected: chat {self.room_id} does not exist"
@@ -93,9 +125,27 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Add to group and accept
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
+        self.jobs.start()
+        if DIRECT_STREAMING:
+            await ChatPresence.join(self.room_id)
+            self._present = True
+            # Let a connection that is streaming right now start broadcasting to us.
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {"type": "peer_joined", "origin": self.channel_name},
+            )
+
+        resume_from = self._query_param("resume_from")
+        if resume_from is not None:
+            await self._resume(resume_from)
         return None
 
     async def disconnect(self, close_code) -> None:
+        self._closed = True
+        await self.jobs.close()
+        if self._present:
+            await ChatPresence.leave(self.room_id)
+            self._present = False
         if self.room_group_name:
             await self.channel_layer.group_discard(
                 self.room_group_name, self.channel_name
@@ -106,12 +156,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         payload = json.loads(text_data)
+        action = payload.get("action") or {}
+
+        if payload.get("resume_from") is not None and not payload.get("message"):
+            await self._resume(payload["resume_from"])
+            return
+
+        if isinstance(action, dict) and action.get("type") == WSAction.STOP:
+            # Cancelled generations store their partial answer as truncated.
+            self.jobs.cancel_current()
+            return
+
         message_text = (payload.get("message") or "").strip()
         if not message_text:
             return
 
         file_ids = payload.get("file_ids") if payload.get("file_ids") else None
-        action = payload.get("action") or {}
 
         action_type: Optional[str] = None
         file_format: Optional[str] = None
@@ -128,229 +188,516 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 action_type = None
                 file_format = None
 
+        # Generations run on the job queue worker so receive returns immediately.
+        job = ChatJob(
+            id=self.jobs.next_id(),
+            message_text=message_text,
+            file_ids=file_ids,
+            action_type=action_type,
+            file_format=file_format,
+        )
+        position = self.jobs.submit(job)
+        if position is None:
+            await self.error(
+                {
+                    "message": "Too many messages are waiting for an answer. Try again shortly."
+                }
+            )
+            return
+
+        await self._refresh_peers()
+        await self._emit({"type": WSType.ACK, "job_id": job.id})
+        job.timer.mark("ack")
+        if position:
+            await self._send_queue_positions([(job.id, position)])
+
+    async def _send_queue_positions(self, positions) -> None:
+        for job_id, position in positions:
+            await self.queued({"job_id": job_id, "position": position})
+
+    async def _handle_message(self, job: ChatJob) -> None:
+        self._replay = StreamReplay(self.room_id)
+        try:
+            await self._run_job(job)
+        finally:
+            self._replay = None
+
+    async def _run_job(self, job: ChatJob) -> None:
+        message_text = job.message_text
+        file_ids = job.file_ids
+        timer = job.timer
+
+        # Persisting the user message runs alongside the context lookup. It is only
+        # prompt-critical when files are attached (ownership check + vector store).
+        save_task = asyncio.create_task(
+            timer.track(
+                "save_message",
+                self.chat_service.save_message(
+                    self.chat, self.user, message_text, file_ids
+                ),
+            )
+        )
+        context_task = asyncio.create_task(
+            timer.track("user_context", self._load_user_context())
+        )
+
+        message_saved = asyncio.create_task(self._await_user_message(save_task))
+
+        try:
+            if file_ids and not await asyncio.shield(message_saved):
+                context_task.cancel()
+                return
+
+            user_context = await context_task
+            if file_ids:
+                await timer.track("files_ready", self._wait_for_files(file_ids))
+        except asyncio.CancelledError:
+            # Stopped before the model was invoked; the user message is still stored.
+            await self._emit({"type": WSType.AI_END})
+            return
+
+        # Generate and stream AI response
+        await self._generate_and_stream_ai_response(
+            user_message=message_text,
+            vector_store_id=self._searchable_vector_store(),
+            user_context=user_context,
+            message_saved=message_saved,
+            timer=timer,
+            action_type=job.action_type,
+            file_format=job.file_format,
+        )
+        logger.info(f"Chat {getattr(self.chat, 'id', None)} pipeline: {timer}")
+
+    def _searchable_vector_store(self) -> Optional[str]:
+        """The chat's vector store id once it has files ready for search, else None."""
+        if self.chat.vector_store_file_count:
+            return self.chat.vector_store_id
+        return None
+
+    async def _wait_for_files(self, file_ids) -> None:
+        """
+        Hold the answer until the attached files are indexed, so file_search can
+        see them, or until ``CHAT_FILE_READY_TIMEOUT`` runs out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + FILE_READY_TIMEOUT
+        pending = {int(file_id) for file_id in file_ids}
+        while True:
+            pending -= self._settled_files
+            remaining = deadline - loop.time()
+            if not pending or remaining <= 0:
+                break
+            self._files_changed.clear()
+            try:
+                await asyncio.wait_for(self._files_changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        if pending:
+            logger.info(
+                f"Chat {self.chat.id}: answering before files {sorted(pending)} are ready"
+            )
+
+    def _allow_storage(self) -> bool:
         try:
-            await self.chat_service.save_message(
-                self.chat, self.user, message_text, file_ids
+            return bool(self.user.allow_memory_storage)
+        except Exception as e:
+            logger.debug(
+                f"User {getattr(self.user, 'id', None)} has no profile; defaulting allow_storage=True : {e}"
+            )
+            return True
+
+    async def _load_user_context(self) -> Dict:
+        if not self._allow_storage():
+            return {}
+        try:
+            return await self.chat_service.get_user_context(self.user)
+        except Exception as e:
+            logger.warning(
+                f"Failed to retrieve user context for user {getattr(self.user, 'id', None)}: {e}"
             )
+            return {}
+
+    async def _await_user_message(self, save_task: asyncio.Task) -> bool:
+        """
+        Wait for the user message to be stored and start context extraction for it.
+        Failures are reported to the client and result in ``False``.
+        """
+        try:
+            await save_task
         except PermissionError as e:
             logger.warning(f"Message save failed (user {self.user.id}): {e}")
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await self._emit(
                 {
                     "type": WSType.ERROR,
                     "message": "Some attached files do not belong to you.",
                 },
             )
-            return
+            return False
         except Exception as e:
             logger.exception(
                 f"Failed to save user message for user {getattr(self.user, 'id', None)}: {e}"
             )
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await self._emit(
                 {
                     "type": WSType.ERROR,
                     "message": "Could not save your message. Try again.",
                 },
             )
-            return
+            return False
 
+        self._run_in_background(self._update_context(save_task.result()))
+        return True
+
+    def _run_in_background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _update_context(self, message: Message) -> None:
+        """Queue the message for user-fact extraction without holding up the answer."""
+        timer = StageTimer()
         try:
-            if await self.chat_service.should_update_context(self.chat):
-                await self.chat_service.update_context(
-                    self.user, message_text, self.ai_service
+            with timer.stage("should_update"):
+                should_update = await self.chat_service.should_update_context(self.chat)
+            if should_update:
+                await timer.track(
+                    "queue_extract",
+                    self.chat_service.update_context(self.user, message.message),
                 )
         except Exception as e:
             logger.warning(
                 f"Context update attempt failed for user {getattr(self.user, 'id', None)}: {e}"
             )
-
-        # Generate and stream AI response
-        await self._generate_and_stream_ai_response(
-            user_message=message_text,
-            vector_store_id=self.chat.vector_store_id,
-            action_type=action_type,
-            file_format=file_format,
-        )
+        logger.debug(f"Context update for user {self.user.id}: {timer}")
 
     async def _generate_and_stream_ai_response(
         self,
         user_message: str,
         vector_store_id: Optional[str],
+        user_context: Dict,
+        message_saved: asyncio.Task,
+        timer: StageTimer,
         action_type: Optional[str] = None,
         file_format: Optional[str] = None,
     ) -> None:
         """Generate a response from the AI and stream chunks to the WebSocket group.
 
         If requested, also generate a file (PDF/DOCX) from the AI's full response using a thread so the
-        event loop isn't blocked.
+        event loop isn't blocked. The AI message is stored only once ``message_saved``
+        reports that the user message has been persisted.
+
+        When the task is cancelled (stop action or disconnect) the upstream stream is
+        closed and whatever was generated so far is stored with ``truncated=True``.
         """
-        file_ids = None
+        coalescer = ChunkCoalescer(
+            self._send_chunk,
+            chunk_size=DEFAULT_CHUNK_SIZE,
+            max_latency=DEFAULT_CHUNK_LATENCY_MS / 1000,
+        )
+        full_response: str = ""
+        openai_response_id = None
+        usage = None
+        truncated = False
+        ai_response = None
 
         try:
             try:
-                allow_storage = bool(self.user.allow_memory_storage)
-            except Exception as e:
-                logger.debug(
-                    f"User {getattr(self.user, 'id', None)} has no profile; defaulting allow_storage=True : {e}"
-                )
-                allow_storage = True
-
-            user_context: Dict = {}
-            full_response: str = ""
-            openai_response_id = None
-
-            if allow_storage:
-                try:
-                    user_context = await self.chat_service.get_user_context(self.user)
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to retrieve user context for user {getattr(self.user, 'id', None)}: {e}"
-                    )
-                    user_context = {}
-
-            ai_response = await self.ai_service.generate_response(
-                user_message=user_message,
-                specialization_prompt=getattr(self.specialization, "prompt", "") or "",
-                user_context=user_context,
-                chat=self.chat,
-                vector_store_id=vector_store_id,
-            )
-
-            async for event in ai_response:
-                openai_response_id = None
-                resp = getattr(event, "response", None)
-                if resp:
-                    openai_response_id = getattr(resp, "id", None)
-                etype = getattr(event, "type", None) or (
-                    event.get("type") if isinstance(event, dict) else None
+                ai_response = await self.ai_service.generate_response(
+                    user_message=user_message,
+                    specialization_prompt=getattr(self.specialization, "prompt", "")
+                    or "",
+                    user_context=user_context,
+                    chat=self.chat,
+                    vector_store_id=vector_store_id,
                 )
-                if etype == "response.created":
-                    await self.channel_layer.group_send(
-                        self.room_group_name, {"type": WSType.AI_START}
-                    )
-                elif etype == "response.output_text.delta":
-                    delta = getattr(event, "delta", None) or event.get("delta")
-                    if delta:
-                        full_response += delta
-                        if not action_type:
-                            await self.channel_layer.group_send(
-                                self.room_group_name,
-                                {"type": WSType.AI_CHUNK, "chunk": delta},
-                            )
-                elif etype == "error":
-                    error_msg = getattr(event, "message", None) or event.get(
-                        "message", "An error occurred while generating the AI response."
-                    )
-                    logger.error(
-                        f"AI response error for user {getattr(self.user, 'id', None)} in chat {getattr(self.chat, 'id', None)}: {error_msg}"
-                    )
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {"type": WSType.ERROR, "message": error_msg},
-                    )
 
-            if full_response:
-                if action_type == WSAction.GENERATE_FILE and file_format:
-                    try:
-                        loop = asyncio.get_running_loop()
-                        file_ids = await loop.run_in_executor(
-                            None, file_service, full_response, file_format, self.user
-                        )
-                        if file_ids:
-                            for fid in file_ids:
-                                try:
-                                    file_obj = await database_sync_to_async(
-                                        lambda: ChatResource.objects.get(
-                                            id=fid, user=self.user
-                                        )
-                                    )()
-                                    if file_obj:
-                                        await self.channel_layer.group_send(
-                                            self.room_group_name,
-                                            {
-                                                "type": WSType.AI_FILE,
-                                                "file_url": file_obj.file.url,
-                                            },
-                                        )
-                                except ChatResource.DoesNotExist:
-                                    logger.warning(
-                                        f"Generated file ID {fid} does not exist or does not belong to user {self.user.id}"
-                                    )
-                                except Exception as e:
-                                    logger.exception(
-                                        f"Error fetching/generated file {fid} for user {self.user.id}: {e}"
-                                    )
-                    except Exception as e:
-                        logger.exception(
-                            f"File generation failed for user {getattr(self.user, 'id', None)}: {e}"
-                        )
-                        await self.channel_layer.group_send(
-                            self.room_group_name,
-                            {
-                                "type": WSType.ERROR,
-                                "message": "Failed to generate file from AI response.",
-                            },
+                async for event in ai_response:
+                    resp = getattr(event, "response", None)
+                    if resp:
+                        openai_response_id = (
+                            getattr(resp, "id", None) or openai_response_id
                         )
-
-                await self.channel_layer.group_send(
-                    self.room_group_name, {"type": WSType.AI_END}
-                )
-
-                try:
-                    ai_msg = await self.chat_service.save_message(
-                        chat=self.chat,
-                        sender=None,
-                        text=full_response,
-                        file_ids=file_ids,
+                        usage = getattr(resp, "usage", None) or usage
+                    etype = getattr(event, "type", None) or (
+                        event.get("type") if isinstance(event, dict) else None
                     )
-                except Exception as e:
-                    logger.exception(
-                        f"Failed to save AI message for chat {getattr(self.chat, 'id', None)}: {e}"
-                    )
-                    ai_msg = None
-
-                if ai_msg and openai_response_id:
-                    try:
-                        ai_msg.openai_response_id = openai_response_id
-                        await database_sync_to_async(ai_msg.save)(
-                            update_fields=["openai_response_id"]
+                    if etype == "response.created":
+                        await self._emit({"type": WSType.AI_START})
+                    elif etype == "response.output_text.delta":
+                        delta = getattr(event, "delta", None) or event.get("delta")
+                        if delta:
+                            if not full_response:
+                                timer.mark("first_token")
+                            full_response += delta
+                            if not action_type:
+                                await coalescer.add(delta)
+                    elif etype == "error":
+                        error_msg = getattr(event, "message", None) or event.get(
+                            "message",
+                            "An error occurred while generating the AI response.",
                         )
-                    except Exception as e:
-                        logger.debug(
-                            f"Could not persist openai_response_id for message: {e}"
+                        logger.error(
+                            f"AI response error for user {getattr(self.user, 'id', None)} in chat {getattr(self.chat, 'id', None)}: {error_msg}"
                         )
-
-                try:
-                    if self.chat and (
-                        not self.chat.name
-                        or self.chat.name.lower() in {"new chat", "untitled"}
-                    ):
-                        new_title = await self.ai_service.generate_title(full_response)
-                        if new_title:
-                            await self.chat_service.update_chat_name(
-                                self.chat, new_title
-                            )
-                except Exception as e:
-                    logger.debug(
-                        f"Failed to generate/update chat title for chat {getattr(self.chat, 'id', None)}: {e}"
+                        await coalescer.close()
+                        await self._emit({"type": WSType.ERROR, "message": error_msg})
+            except asyncio.CancelledError:
+                truncated = True
+                logger.info(
+                    f"AI response for chat {getattr(self.chat, 'id', None)} stopped after {len(full_response)} chars"
+                )
+                await self._close_stream(ai_response)
+
+            timer.mark("stream_end")
+
+            if full_response or truncated:
+                # Shielded so a second cancellation cannot interrupt persisting the answer.
+                await asyncio.shield(
+                    self._finish_response(
+                        full_response=full_response,
+                        user_message=user_message,
+                        openai_response_id=openai_response_id,
+                        usage=usage,
+                        truncated=truncated,
+                        message_saved=message_saved,
+                        coalescer=coalescer,
+                        timer=timer,
+                        action_type=action_type,
+                        file_format=file_format,
                     )
+                )
 
         except Exception as e:
             logger.exception(
                 f"AI response generation failed for user {getattr(self.user, 'id', None)} in chat {getattr(self.chat, 'id', None)}: {e}"
             )
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await coalescer.close()
+            await self._emit(
                 {
                     "type": WSType.ERROR,
                     "message": "[⚠️ AI error] Could not generate response. Try again later.",
                 },
             )
+            await self._emit({"type": WSType.AI_END})
+
+    @staticmethod
+    def _usage_dict(usage: Any) -> Optional[Dict[str, int]]:
+        if usage is None:
+            return None
+        return {
+            key: getattr(usage, key, None)
+            for key in ("input_tokens", "output_tokens", "total_tokens")
+        }
+
+    @staticmethod
+    async def _close_stream(ai_response) -> None:
+        if ai_response is None:
+            return
+        try:
+            await ai_response.close()
+        except Exception as e:
+            logger.debug(f"Failed to close upstream AI stream: {e}")
+
+    async def _finish_response(
+        self,
+        full_response: str,
+        user_message: str,
+        openai_response_id: Optional[str],
+        usage: Any,
+        truncated: bool,
+        message_saved: asyncio.Task,
+        coalescer: ChunkCoalescer,
+        timer: StageTimer,
+        action_type: Optional[str] = None,
+        file_format: Optional[str] = None,
+    ) -> None:
+        file_ids = None
+
+        if not truncated and action_type == WSAction.GENERATE_FILE and file_format:
+            try:
+                loop = asyncio.get_running_loop()
+                file_ids = await loop.run_in_executor(
+                    None, file_service, full_response, file_format, self.user
+                )
+                if file_ids:
+                    for fid in file_ids:
+                        try:
+                            file_obj = await ChatResource.objects.aget(
+                                id=fid, user=self.user
+                            )
+                            if file_obj:
+                                await self._emit(
+                                    {
+                                        "type": WSType.AI_FILE,
+                                        "file_url": file_obj.file.url,
+                                    },
+                                )
+                        except ChatResource.DoesNotExist:
+                            logger.warning(
+                                f"Generated file ID {fid} does not exist or does not belong to user {self.user.id}"
+                            )
+                        except Exception as e:
+                            logger.exception(
+                                f"Error fetching/generated file {fid} for user {self.user.id}: {e}"
+                            )
+            except Exception as e:
+                logger.exception(
+                    f"File generation failed for user {getattr(self.user, 'id', None)}: {e}"
+                )
+                await self._emit(
+                    {
+                        "type": WSType.ERROR,
+                        "message": "Failed to generate file from AI response.",
+                    },
+                )
+
+        await coalescer.close()
+        logger.debug(
+            f"AI stream for chat {getattr(self.chat, 'id', None)} coalesced: {coalescer.stats()}"
+        )
+        await self._emit({"type": WSType.AI_END})
+
+        if not full_response:
+            return
+
+        persister = get_message_persister()
+        try:
+            if await message_saved:
+                await timer.track(
+                    "queue_ai_message",
+                    persister.submit(
+                        self.chat,
+                        PendingWrite(
+                            chat_id=self.chat.id,
+                            text=full_response,
+                            openai_response_id=openai_response_id,
+                            truncated=truncated,
+                            file_ids=list(file_ids or []),
+                            usage=self._usage_dict(usage),
+                        ),
+                    ),
+                )
+        except Exception as e:
+            logger.exception(
+                f"Failed to save AI message for chat {getattr(self.chat, 'id', None)}: {e}"
+            )
+
+        try:
+            if self.chat and needs_title(self.chat.name):
+                await self._set_title(full_response, user_message)
+        except Exception as e:
+            logger.debug(
+                f"Failed to generate/update chat title for chat {getattr(self.chat, 'id', None)}: {e}"
+            )
+
+    async def _set_title(self, full_response: str, user_message: str) -> None:
+        """
+        Title a new chat from the answer's heading or the user's key words.
+        The LLM is asked only if that fails and CHAT_TITLE_LLM_FALLBACK is on.
+        Without a title the claim is released so a later answer can try again.
+        """
+        if not await claim_title(self.chat.id):
+            return
+        title = generate_local_title(full_response, user_message)
+        if title:
+            await get_message_persister().submit(
+                self.chat, PendingWrite(chat_id=self.chat.id, title=title)
+            )
+        elif TITLE_LLM_FALLBACK:
+            self._run_in_background(self._set_llm_title(full_response))
+        else:
+            await release_title(self.chat.id)
+
+    async def _set_llm_title(self, full_response: str) -> None:
+        title = None
+        try:
+            title = await self.ai_service.generate_title(full_response)
+            if title:
+                await get_message_persister().submit(
+                    self.chat, PendingWrite(chat_id=self.chat.id, title=title)
+                )
+        except Exception as e:
+            title = None
+            logger.debug(f"LLM title failed for chat {self.chat.id}: {e}")
+        finally:
+            if not title:
+                await release_title(self.chat.id)
+
+    async def _refresh_peers(self) -> None:
+        """Check whether other connections (e.g. other tabs) are joined to this room."""
+        if DIRECT_STREAMING:
+            self.has_peers = await ChatPresence.count(self.room_id) > 1
+
+    async def _emit(self, event: Dict) -> None:
+        """
+        Deliver an event to this room.
+
+        With direct streaming the frame is written straight to our own socket and the
+        channel layer is only used when other connections are joined to the room;
+        otherwise everything goes through the group broadcast.
+        """
+        if self._replay is not None and event["type"] in STREAM_FRAMES:
+            event = await self._replay.record(event)
+
+        if not DIRECT_STREAMING:
+            await self.channel_layer.group_send(self.room_group_name, event)
+            return
+
+        if not self._closed:
+            try:
+                await getattr(self, event["type"])(event)
+            except Exception as e:
+                logger.debug(f"Failed to write {event['type']} frame to socket: {e}")
+        if self.has_peers:
             await self.channel_layer.group_send(
-                self.room_group_name, {"type": WSType.AI_END}
+                self.room_group_name, {**event, "origin": self.channel_name}
             )
 
+    def _is_own_event(self, event: Dict) -> bool:
+        return event.get("origin") == self.channel_name
+
+    def _already_replayed(self, event: Dict) -> bool:
+        if self._replayed is None or "seq" not in event:
+            return False
+        return event["seq"] <= self._replayed
+
+    def _query_param(self, name: str) -> Optional[str]:
+        qs = parse_qs(self.scope.get("query_string", b"").decode())
+        return (qs.get(name) or [None])[0]
+
+    async def _resume(self, resume_from) -> None:
+        """
+        Replay frames in the room the client missed while disconnected.
+        Live frames that were also replayed are skipped afterwards by ``seq``.
+        """
+        try:
+            seq = int(resume_from)
+        except (TypeError, ValueError):
+            await self.error({"message": "Invalid resume_from value."})
+            return
+
+        self._replayed = None
+        frames = await StreamReplay.read_from(self.room_id, seq)
+        for event in frames:
+            event.pop("origin", None)
+            await getattr(self, event["type"])(event)
+        if frames:
+            self._replayed = frames[-1]["seq"]
+        logger.debug(
+            f"Replayed {len(frames)} frames after seq {seq} for chat {self.room_id}"
+        )
+
+    async def _send_frame(self, event: Dict, frame: Dict) -> None:
+        if self._is_own_event(event) or self._already_replayed(event):
+            return
+        if "seq" in event:
+            frame["seq"] = event["seq"]
+            frame["stream_id"] = event.get("stream_id")
+        await self.send(text_data=json.dumps(frame))
+
+    async def _send_chunk(self, chunk: str) -> None:
+        await self._emit({"type": WSType.AI_CHUNK, "chunk": chunk})
+
     async def _authenticate_user(self) -> Union[User, AnonymousUser]:
         try:
             qs = parse_qs(self.scope.get("query_string", b"").decode())
@@ -361,29 +708,66 @@ class ChatConsumer(AsyncWebsocketConsumer):
             validated = UntypedToken(token)
             # UntypedToken behaves like a mapping
             user_id = validated.get("user_id")
-            return await User.objects.aget(id=user_id) if user_id else AnonymousUser()
+            if not user_id:
+                return AnonymousUser()
+            return await User.objects.select_related("specialization").aget(id=user_id)
         except Exception as e:
             logger.error(f"Authentication error while connecting WS: {e}")
             return AnonymousUser()
 
+    async def peer_joined(self, event):
+        if not self._is_own_event(event):
+            self.has_peers = True
+
+    async def ack(self, event):
+        await self._send_frame(
+            event, {"type": WSType.ACK, "job_id": event.get("job_id")}
+        )
+
+    async def queued(self, event):
+        await self._send_frame(
+            event,
+            {
+                "type": WSType.QUEUED,
+                "job_id": event.get("job_id"),
+                "position": event.get("position"),
+            },
+        )
+
     async def ai_chunk(self, event):
         chunk = event.get("chunk", "")
-        await self.send(text_data=json.dumps({"type": WSType.AI_CHUNK, "chunk": chunk}))
+        await self._send_frame(event, {"type": WSType.AI_CHUNK, "chunk": chunk})
 
     async def ai_start(self, event):
-        await self.send(text_data=json.dumps({"type": WSType.AI_START}))
+        await self._send_frame(event, {"type": WSType.AI_START})
 
     async def ai_end(self, event):
-        await self.send(text_data=json.dumps({"type": WSType.AI_END}))
+        await self._send_frame(event, {"type": WSType.AI_END})
 
     async def error(self, event):
         message = event.get("message", "An error occurred.")
-        await self.send(
-            text_data=json.dumps({"type": WSType.ERROR, "message": message})
+        await self._send_frame(event, {"type": WSType.ERROR, "message": message})
+
+    async def file_ready(self, event):
+        """Sent by the vector-store task once attached files are indexed (or failed)."""
+        if event.get("vector_store_id"):
+            self.chat.vector_store_id = event["vector_store_id"]
+            self.chat.vector_store_file_count = max(
+                self.chat.vector_store_file_count,
+                event.get("vector_store_file_count") or 0,
+            )
+        self._settled_files.update(event.get("files", []))
+        self._settled_files.update(event.get("failed", []))
+        self._files_changed.set()
+        await self._send_frame(
+            event,
+            {
+                "type": WSType.FILE_READY,
+                "files": event.get("files", []),
+                "failed": event.get("failed", []),
+            },
         )
 
     async def ai_file(self, event):
         file_url = event.get("file_url", "")
-        await self.send(
-            text_data=json.dumps({"type": WSType.AI_FILE, "file_url": file_url})
-        )
+        await self._send_frame(event, {"type": WSType.AI_FILE, "file_url": file_url})
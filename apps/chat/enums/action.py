@@ -3,6 +3,7 @@ from django.db import models
 
 class WSAction(models.TextChoices):
     GENERATE_FILE = "generate_file", "Generate File"
+    STOP = "stop", "Stop"
 
 
 class FileFormat(models.TextChoices):
@@ -0,0 +1,9 @@
+from django.db import models
+
+
+class FileStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    UPLOADED = "uploaded", "Uploaded"
+    PROCESSING = "processing", "Processing"
+    READY = "ready", "Ready"
+    FAILED = "failed", "Failed"
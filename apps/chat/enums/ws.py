@@ -2,8 +2,11 @@ from django.db import models
 
 
 class WSType(models.TextChoices):
+    ACK = "ack", "Acknowledgement"
+    QUEUED = "queued", "Queued"
     AI_CHUNK = "ai_chunk", "AI Chunk"
     AI_START = "ai_start", "AI Start"
     AI_END = "ai_end", "AI End"
     AI_FILE = "ai_file", "AI File"
+    FILE_READY = "file_ready", "File Ready"
     ERROR = "error", "Error"
@@ -0,0 +1,126 @@
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.chat.models.chat import ChatRoom
+from apps.users.models.users import User
+
+BENCHMARK_EMAIL = "benchmark@chat.local"
+
+ENDPOINTS = {
+    "list": ("GET", "/api/v1/chat/chats/"),
+    "history": ("GET", "/api/v1/chat/messages/{chat_id}/"),
+    "create": ("POST", "/api/v1/chat/chats/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the chat REST endpoints of a running server with concurrent "
+        "requests and report throughput and latency. Run it against the sync "
+        "and the async build to compare them. Raise the user throttle rate "
+        "first, or most requests of a large run will be rejected with 429"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="list")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={"username": "benchmark"}
+        )
+        token = str(RefreshToken.for_user(user).access_token)
+
+        method, path = ENDPOINTS[options["endpoint"]]
+        chat: Optional[ChatRoom] = None
+        if "{chat_id}" in path:
+            chat = ChatRoom.objects.create(name="API benchmark", participant=user)
+            path = path.format(chat_id=chat.id)
+        last_id = ChatRoom.objects.order_by("-id").values_list("id", flat=True).first()
+
+        try:
+            result = asyncio.run(
+                self._run(
+                    url=options["base_url"].rstrip("/") + path,
+                    method=method,
+                    token=token,
+                    total=options["requests"],
+                    concurrency=options["concurrency"],
+                    timeout=options["timeout"],
+                )
+            )
+        finally:
+            if chat is not None:
+                chat.delete()
+            if method == "POST":
+                ChatRoom.objects.filter(participant=user, id__gt=last_id or 0).delete()
+
+        if not result["latencies"]:
+            raise CommandError("No request completed.")
+        latencies = sorted(result["latencies"])
+        quantiles = statistics.quantiles(latencies, n=100)
+
+        self.stdout.write(f"endpoint:      {method} {path}")
+        self.stdout.write(f"requests:      {options['requests']}")
+        self.stdout.write(f"concurrency:   {options['concurrency']}")
+        self.stdout.write(f"throughput:    {result['rps']:.1f} req/s")
+        self.stdout.write(f"latency p50:   {quantiles[49] * 1000:.0f} ms")
+        self.stdout.write(f"latency p95:   {quantiles[94] * 1000:.0f} ms")
+        self.stdout.write(f"latency p99:   {quantiles[98] * 1000:.0f} ms")
+        self.stdout.write(f"latency max:   {latencies[-1] * 1000:.0f} ms")
+        statuses = ", ".join(
+            f"{code}: {count}" for code, count in sorted(result["statuses"].items())
+        )
+        self.stdout.write(f"statuses:      {statuses}")
+
+    @staticmethod
+    async def _run(
+        url: str, method: str, token: str, total: int, concurrency: int, timeout: float
+    ):
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        async with httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {token}"},
+            limits=limits,
+            timeout=timeout,
+        ) as client:
+            body = {} if method == "POST" else None
+
+            async def worker():
+                while not queue.empty():
+                    queue.get_nowait()
+                    started = time.perf_counter()
+                    try:
+                        response = await client.request(method, url, json=body)
+                        statuses[str(response.status_code)] += 1
+                    except httpx.HTTPError as e:
+                        statuses[type(e).__name__] += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return {
+            "latencies": latencies,
+            "statuses": statuses,
+            "rps": len(latencies) / elapsed,
+        }
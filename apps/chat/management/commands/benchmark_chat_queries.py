@@ -0,0 +1,195 @@
+import re
+from typing import List, Tuple
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.chat.models.chat import ChatRoom, Message
+from apps.users.models.users import User
+
+BENCHMARK_EMAIL = "benchmark@chat.local"
+
+# Indexes added for the chat hot paths (see migration 0007).
+HOT_INDEXES = [
+    "chat_rooms_part_last_msg_idx",
+    "messages_chat_created_idx",
+    "messages_chat_ai_idx",
+]
+
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large chat dataset and print EXPLAIN ANALYZE timings of the chat "
+        "hot queries without and with the composite indexes (PostgreSQL only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1_000_000)
+        parser.add_argument("--chats", type=int, default=1000)
+        parser.add_argument(
+            "--skip-seed",
+            action="store_true",
+            help="Reuse the dataset seeded by a previous run",
+        )
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete the benchmark user, chats and messages and exit",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print full query plans, not only execution times",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark needs PostgreSQL.")
+
+        if options["cleanup"]:
+            deleted, _ = User.objects.filter(email=BENCHMARK_EMAIL).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} rows."))
+            return
+
+        user = self._get_user()
+        if not options["skip_seed"]:
+            self._seed(user, options["chats"], options["messages"])
+
+        chat = (
+            ChatRoom.objects.filter(participant=user)
+            .order_by("-user_message_count")
+            .first()
+        )
+        if chat is None:
+            raise CommandError("No benchmark data found; run without --skip-seed.")
+
+        queries = self._hot_queries(user, chat)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in HOT_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            before = self._explain_all(queries, options["verbose_plans"])
+            # DDL is transactional in PostgreSQL: rolling back restores the indexes.
+            transaction.set_rollback(True)
+
+        after = self._explain_all(queries, options["verbose_plans"])
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<28}{'without idx':>14}{'with idx':>12}")
+        for name, _, _ in queries:
+            self.stdout.write(
+                f"{name:<28}{before[name]:>11.2f} ms{after[name]:>9.2f} ms"
+            )
+
+    def _get_user(self) -> User:
+        user, created = User.objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={"username": "benchmark"}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        return user
+
+    def _seed(self, user: User, chats: int, messages: int) -> None:
+        self.stdout.write(f"Seeding {chats} chats and {messages} messages...")
+        now = timezone.now()
+        rooms = ChatRoom.objects.bulk_create(
+            [
+                ChatRoom(name=f"Benchmark {i}", participant=user, last_message_at=now)
+                for i in range(chats)
+            ],
+            batch_size=1000,
+        )
+        chat_ids = [room.id for room in rooms]
+
+        # Skewed distribution: the first chat gets a quarter of all messages.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Message._meta.db_table}
+                    (chat_id, sender_id, message, truncated, created_at, updated_at)
+                SELECT
+                    CASE WHEN g %% 4 = 0 THEN %(hot)s
+                         ELSE (%(chat_ids)s::bigint[])[1 + (g %% %(chat_count)s)]
+                    END,
+                    CASE WHEN g %% 2 = 0 THEN NULL ELSE %(user_id)s END,
+                    'benchmark message ' || g,
+                    false,
+                    %(now)s - make_interval(secs => %(total)s - g),
+                    %(now)s
+                FROM generate_series(1, %(total)s) AS g
+                """,
+                {
+                    "hot": chat_ids[0],
+                    "chat_ids": chat_ids,
+                    "chat_count": len(chat_ids),
+                    "user_id": user.id,
+                    "now": now,
+                    "total": messages,
+                },
+            )
+            cursor.execute(f"ANALYZE {Message._meta.db_table}")
+            cursor.execute(f"ANALYZE {ChatRoom._meta.db_table}")
+
+        call_command("reconcile_chat_counters", stdout=self.stdout)
+
+    @staticmethod
+    def _hot_queries(user: User, chat: ChatRoom) -> List[Tuple[str, str, tuple]]:
+        middle = (
+            Message.objects.filter(chat=chat)
+            .order_by("created_at", "id")
+            .values_list("created_at", "id")[chat.user_message_count]
+        )
+        querysets = [
+            (
+                "history_first_page",
+                Message.objects.filter(chat=chat).order_by("created_at", "id")[:20],
+            ),
+            (
+                "history_deep_page",
+                Message.objects.filter(chat=chat)
+                .filter(
+                    Q(created_at__gt=middle[0])
+                    | Q(created_at=middle[0], id__gt=middle[1])
+                )
+                .order_by("created_at", "id")[:20],
+            ),
+            (
+                "chat_list",
+                ChatRoom.objects.filter(participant=user).order_by(
+                    "-last_message_at", "-id"
+                )[:20],
+            ),
+        ]
+        queries = []
+        for name, qs in querysets:
+            sql, params = qs.query.sql_with_params()
+            queries.append((name, sql, params))
+
+        ai_sql, ai_params = (
+            Message.objects.filter(chat=chat, sender__isnull=True)
+            .values("id")
+            .query.sql_with_params()
+        )
+        queries.append(
+            ("ai_message_count", f"SELECT COUNT(*) FROM ({ai_sql}) AS sub", ai_params)
+        )
+        return queries
+
+    def _explain_all(self, queries, verbose: bool) -> dict:
+        timings = {}
+        with connection.cursor() as cursor:
+            for name, sql, params in queries:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                match = EXECUTION_TIME.search(plan)
+                timings[name] = float(match.group(1)) if match else float("nan")
+                if verbose:
+                    self.stdout.write(f"--- {name}\n{plan}\n")
+        return timings
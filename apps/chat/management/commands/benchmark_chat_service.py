@@ -0,0 +1,142 @@
+import asyncio
+import statistics
+import time
+from typing import List
+
+from asgiref.sync import SyncToAsync
+from channels.db import database_sync_to_async
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from apps.chat.models.chat import ChatRoom, Message, UserContext
+from apps.chat.services.chat import ChatService
+from apps.users.models.users import User
+
+BENCHMARK_EMAIL = "benchmark@chat.local"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent simulated chat turns against the database and report how "
+        "many ORM thread hops they take and how deep the executor queue gets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chats", type=int, default=200)
+        parser.add_argument("--turns", type=int, default=3)
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Replay the previous pattern of one database_sync_to_async per call",
+        )
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={"username": "benchmark"}
+        )
+        rooms = ChatRoom.objects.bulk_create(
+            [
+                ChatRoom(name=f"Service benchmark {i}", participant=user)
+                for i in range(options["chats"])
+            ]
+        )
+        try:
+            result = asyncio.run(
+                self._run(user, rooms, options["turns"], options["legacy"])
+            )
+        finally:
+            ChatRoom.objects.filter(id__in=[room.id for room in rooms]).delete()
+
+        mode = "legacy" if options["legacy"] else "async ORM"
+        self.stdout.write(f"mode:               {mode}")
+        self.stdout.write(f"turns:              {result['turns']}")
+        self.stdout.write(f"thread hops:        {result['hops']}")
+        per_turn = result["hops"] / result["turns"]
+        self.stdout.write(f"hops per turn:      {per_turn:.1f}")
+        self.stdout.write(f"max queue depth:    {result['max_depth']}")
+        self.stdout.write(f"mean queue depth:   {result['mean_depth']:.1f}")
+        self.stdout.write(f"wall time:          {result['elapsed']:.2f} s")
+
+    async def _run(self, user: User, rooms: List[ChatRoom], turns: int, legacy: bool):
+        # Outside of async_to_sync every thread-sensitive hop lands on this
+        # single-worker executor, so its queue is the ASGI thread-pool backlog.
+        executor = SyncToAsync.single_thread_executor
+        submit = executor.submit
+        hops = 0
+
+        def counting_submit(*args, **kwargs):
+            nonlocal hops
+            hops += 1
+            return submit(*args, **kwargs)
+
+        executor.submit = counting_submit
+        depths: List[int] = []
+        done = asyncio.Event()
+
+        async def sample():
+            while not done.is_set():
+                depths.append(executor._work_queue.qsize())
+                await asyncio.sleep(0.005)
+
+        turn = self._legacy_turn if legacy else self._turn
+        sampler = asyncio.create_task(sample())
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(turn(user, room, n) for room in rooms for n in range(turns))
+            )
+        finally:
+            elapsed = time.perf_counter() - started
+            done.set()
+            await sampler
+            executor.submit = submit
+
+        return {
+            "turns": len(rooms) * turns,
+            "hops": hops,
+            "max_depth": max(depths, default=0),
+            "mean_depth": statistics.fmean(depths) if depths else 0.0,
+            "elapsed": elapsed,
+        }
+
+    @staticmethod
+    async def _turn(user: User, room: ChatRoom, n: int) -> None:
+        await User.objects.select_related("specialization").aget(id=user.id)
+        await ChatRoom.objects.aget(id=room.id)
+        await ChatService.save_message(room, user, f"benchmark question {n}")
+        await ChatService.get_user_context(user)
+        await ChatService.save_message(
+            room, None, f"benchmark answer {n}", openai_response_id="resp_benchmark"
+        )
+        await ChatService.update_chat_name(room, f"Service benchmark {n}")
+
+    @staticmethod
+    async def _legacy_turn(user: User, room: ChatRoom, n: int) -> None:
+        legacy_user = await User.objects.aget(id=user.id)
+        await database_sync_to_async(lambda: legacy_user.specialization)()
+        await database_sync_to_async(ChatRoom.objects.get)(id=room.id)
+
+        for sender, text in ((user, f"benchmark question {n}"), (None, "answer")):
+            message = await database_sync_to_async(Message.objects.create)(
+                chat=room, sender=sender, message=text
+            )
+            field = "ai_message_count" if sender is None else "user_message_count"
+            await database_sync_to_async(ChatRoom.objects.filter(id=room.id).update)(
+                **{field: F(field) + 1, "last_message_at": message.created_at}
+            )
+            if sender is None:
+                message.openai_response_id = "resp_benchmark"
+                await database_sync_to_async(message.save)(
+                    update_fields=["openai_response_id"]
+                )
+            else:
+                ctx_obj, _ = await database_sync_to_async(
+                    UserContext.objects.get_or_create
+                )(user=user)
+                await database_sync_to_async(ctx_obj.get_valid_context)()
+
+        def _rename():
+            room.name = f"Service benchmark {n}"
+            room.save(update_fields=["name"])
+
+        await database_sync_to_async(_rename)()
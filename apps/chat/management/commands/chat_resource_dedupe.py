@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum
+
+from apps.chat.models.chat import ChatResource
+from apps.shared.utils.upload import file_sha256
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the storage bytes and OpenAI uploads saved by content-hash "
+        "deduplication of chat resources; --backfill hashes older files first"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Hash resources stored before deduplication existed",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of resources hashed per batch",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self._backfill(options["batch_size"])
+
+        totals = ChatResource.objects.aggregate(
+            reused=Sum("reuse_count"),
+            bytes_saved=Sum(F("reuse_count") * F("size")),
+            uploads_saved=Sum("reuse_count", filter=Q(file_id__isnull=False)),
+        )
+        reused = totals["reused"] or 0
+        bytes_saved = totals["bytes_saved"] or 0
+        uploads_saved = totals["uploads_saved"] or 0
+
+        self.stdout.write(f"duplicate files reused:  {reused}")
+        self.stdout.write(
+            f"storage bytes saved:     {bytes_saved} ({bytes_saved / 1024 / 1024:.1f} MB)"
+        )
+        self.stdout.write(f"OpenAI uploads saved:    {uploads_saved}")
+
+    def _backfill(self, batch_size: int) -> None:
+        """
+        Hash resources without a digest. Older duplicates keep a null hash so the
+        unique index holds; they are reported but not merged.
+        """
+        hashed = duplicates = missing = 0
+        duplicate_bytes = 0
+        last_id = 0
+        while True:
+            resources = list(
+                ChatResource.objects.filter(id__gt=last_id, sha256__isnull=True)
+                .order_by("id")
+                .only("id", "user_id", "file", "size")[:batch_size]
+            )
+            if not resources:
+                break
+            last_id = resources[-1].id
+
+            for resource in resources:
+                try:
+                    with resource.file.open("rb"):
+                        digest = file_sha256(resource.file)
+                except (FileNotFoundError, OSError):
+                    missing += 1
+                    continue
+                if ChatResource.objects.filter(
+                    user_id=resource.user_id, sha256=digest
+                ).exists():
+                    duplicates += 1
+                    duplicate_bytes += resource.size or 0
+                    continue
+                ChatResource.objects.filter(id=resource.id).update(sha256=digest)
+                hashed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Hashed {hashed} resources; {duplicates} older duplicates "
+                f"({duplicate_bytes} bytes) left unhashed, {missing} files missing."
+            )
+        )
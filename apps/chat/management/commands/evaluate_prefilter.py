@@ -0,0 +1,83 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.chat.services.prefilter import fact_prefilter
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "data" / "prefilter_corpus.jsonl"
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate the user-fact prefilter on a labeled corpus: precision, recall "
+        "and the share of LLM extraction calls it avoids"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+        parser.add_argument(
+            "--min-recall",
+            type=float,
+            default=0.0,
+            help="Exit with an error if recall is below this value",
+        )
+        parser.add_argument(
+            "--show-errors",
+            action="store_true",
+            help="Print false positives and false negatives",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["corpus"])
+        if not path.exists():
+            raise CommandError(f"Corpus {path} does not exist.")
+
+        totals = Counter()
+        per_lang = {}
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            result = fact_prefilter.classify(row["text"])
+            predicted = result.should_extract or bool(result.facts)
+            outcome = {
+                (True, True): "tp",
+                (True, False): "fp",
+                (False, True): "fn",
+                (False, False): "tn",
+            }[(predicted, bool(row["label"]))]
+
+            for counter in (
+                totals,
+                per_lang.setdefault(row.get("lang", "?"), Counter()),
+            ):
+                counter[outcome] += 1
+                counter["llm_calls"] += int(result.should_extract)
+                counter["local_only"] += int(
+                    bool(result.facts) and not result.should_extract
+                )
+
+            if options["show_errors"] and outcome in ("fp", "fn"):
+                self.stdout.write(f"{outcome.upper()}: {row['text']} -> {result}")
+
+        for lang, counter in sorted(per_lang.items()):
+            self._report(lang, counter)
+        recall = self._report("all", totals)
+
+        if recall < options["min_recall"]:
+            raise CommandError(
+                f"Recall {recall:.3f} is below the required {options['min_recall']:.3f}"
+            )
+
+    def _report(self, label: str, c: Counter) -> float:
+        total = c["tp"] + c["fp"] + c["fn"] + c["tn"]
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 1.0
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 1.0
+        avoided = 1 - c["llm_calls"] / total if total else 0.0
+        self.stdout.write(
+            f"{label:<4} n={total:<4} precision={precision:.3f} recall={recall:.3f} "
+            f"llm_calls_avoided={avoided:.1%} local_only={c['local_only']}"
+        )
+        return recall
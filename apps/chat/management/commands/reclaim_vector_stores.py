@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.core.management.base import BaseCommand
+from openai import NotFoundError
+
+from apps.chat.models.chat import ChatRoom
+from apps.chat.services.ai import AIService
+from apps.chat.services.client import close_openai_client
+from apps.shared.utils.logger import logger
+
+# (ready files, store is empty and old enough to delete); None if the store is gone.
+_Inspection = Optional[Tuple[int, bool]]
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the empty OpenAI vector stores of existing chats and backfill "
+        "ChatRoom.vector_store_file_count from the stores that have files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of chats processed per batch",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Concurrent OpenAI requests",
+        )
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="Keep empty stores younger than this; their files may be on the way",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be reclaimed",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        min_age = options["min_age_hours"] * 3600
+
+        checked = reclaimed = missing = updated = 0
+        last_id = 0
+
+        while True:
+            chats = list(
+                ChatRoom.objects.filter(id__gt=last_id, vector_store_id__isnull=False)
+                .order_by("id")
+                .only("id", "vector_store_id", "vector_store_file_count")[:batch_size]
+            )
+            if not chats:
+                break
+            last_id = chats[-1].id
+            checked += len(chats)
+
+            inspections = asyncio.run(
+                self._inspect(chats, options["concurrency"], min_age)
+            )
+            cleared: List[ChatRoom] = []
+            to_delete: List[ChatRoom] = []
+            counted: List[ChatRoom] = []
+            for chat in chats:
+                if chat.id not in inspections:
+                    continue  # lookup failed; try again on the next run
+                inspection = inspections[chat.id]
+                if inspection is None:
+                    missing += 1
+                    cleared.append(chat)
+                    continue
+                ready, empty = inspection
+                if empty:
+                    to_delete.append(chat)
+                elif chat.vector_store_file_count != ready:
+                    chat.vector_store_file_count = ready
+                    counted.append(chat)
+
+            reclaimed += len(to_delete)
+            updated += len(counted)
+            if dry_run:
+                continue
+
+            if to_delete:
+                deleted = asyncio.run(self._delete(to_delete, options["concurrency"]))
+                cleared.extend(chat for chat in to_delete if chat.id in deleted)
+            for chat in cleared:
+                # The next attachment creates a new store.
+                ChatRoom.objects.filter(
+                    id=chat.id, vector_store_id=chat.vector_store_id
+                ).update(vector_store_id=None, vector_store_file_count=0)
+            if counted:
+                ChatRoom.objects.bulk_update(counted, ["vector_store_file_count"])
+
+        action = "would be" if dry_run else "were"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} chats: {reclaimed} empty stores {action} deleted, "
+                f"{missing} expired stores {action} cleared, {updated} file counts "
+                f"{action} updated."
+            )
+        )
+
+    async def _inspect(
+        self, chats: List[ChatRoom], concurrency: int, min_age: float
+    ) -> Dict[int, _Inspection]:
+        client = AIService().client
+        semaphore = asyncio.Semaphore(concurrency)
+        now = time.time()
+        results: Dict[int, _Inspection] = {}
+
+        async def inspect(chat: ChatRoom) -> None:
+            async with semaphore:
+                try:
+                    store = await client.vector_stores.retrieve(chat.vector_store_id)
+                except NotFoundError:
+                    results[chat.id] = None
+                    return
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to inspect vector store of chat {chat.id}: {e}"
+                    )
+                    return
+            counts = store.file_counts
+            empty = counts.total == 0 and now - store.created_at >= min_age
+            results[chat.id] = (counts.completed, empty)
+
+        try:
+            await asyncio.gather(*(inspect(chat) for chat in chats))
+        finally:
+            await close_openai_client()
+        return results
+
+    async def _delete(self, chats: List[ChatRoom], concurrency: int) -> set:
+        service = AIService()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def delete(chat: ChatRoom) -> Optional[int]:
+            async with semaphore:
+                if await service.delete_vector_store(chat.vector_store_id):
+                    return chat.id
+            return None
+
+        try:
+            deleted = await asyncio.gather(*(delete(chat) for chat in chats))
+        finally:
+            await close_openai_client()
+        return {chat_id for chat_id in deleted if chat_id is not None}
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce
+
+from apps.chat.models.chat import ChatRoom
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill and reconcile ChatRoom.user_message_count, ai_message_count and "
+        "last_message_at from the messages table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of chats processed per batch",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report chats whose counters are out of date",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        fields = ["user_message_count", "ai_message_count", "last_message_at"]
+        checked = 0
+        changed = 0
+        last_id = 0
+
+        while True:
+            chats = list(
+                ChatRoom.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "created_at", *fields)
+                .annotate(
+                    real_user_count=Count(
+                        "messages", filter=Q(messages__sender__isnull=False)
+                    ),
+                    real_ai_count=Count(
+                        "messages", filter=Q(messages__sender__isnull=True)
+                    ),
+                    real_last_message_at=Coalesce(
+                        Max("messages__created_at"), F("created_at")
+                    ),
+                )[:batch_size]
+            )
+            if not chats:
+                break
+            last_id = chats[-1].id
+            checked += len(chats)
+
+            stale = []
+            for chat in chats:
+                if (
+                    chat.user_message_count != chat.real_user_count
+                    or chat.ai_message_count != chat.real_ai_count
+                    or chat.last_message_at != chat.real_last_message_at
+                ):
+                    chat.user_message_count = chat.real_user_count
+                    chat.ai_message_count = chat.real_ai_count
+                    chat.last_message_at = chat.real_last_message_at
+                    stale.append(chat)
+
+            changed += len(stale)
+            if stale and not dry_run:
+                ChatRoom.objects.bulk_update(stale, fields)
+
+        action = "would be updated" if dry_run else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} chats, {changed} {action}.")
+        )
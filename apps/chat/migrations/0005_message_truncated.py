@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_rename_vector_stores_id_chatroom_vector_store_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="truncated",
+            field=models.BooleanField(
+                default=False,
+                help_text="Javob foydalanuvchi tomonidan to'xtatilgan (to'liq emas).",
+            ),
+        ),
+    ]
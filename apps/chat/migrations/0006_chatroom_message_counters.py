@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_message_truncated"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="user_message_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Foydalanuvchi xabarlari soni."
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatroom",
+            name="ai_message_count",
+            field=models.PositiveIntegerField(default=0, help_text="AI javoblari soni."),
+        ),
+        migrations.AddField(
+            model_name="chatroom",
+            name="last_message_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, help_text="Oxirgi xabar vaqti."
+            ),
+        ),
+    ]
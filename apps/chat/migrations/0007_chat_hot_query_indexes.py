@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built CONCURRENTLY so large tables stay writable.
+    atomic = False
+
+    dependencies = [
+        ("chat", "0006_chatroom_message_counters"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="chatroom",
+            index=models.Index(
+                fields=["participant", "-last_message_at", "-id"],
+                name="chat_rooms_part_last_msg_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "created_at", "id"],
+                name="messages_chat_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                condition=models.Q(("sender__isnull", True)),
+                fields=["chat", "created_at"],
+                name="messages_chat_ai_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_chat_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="usage",
+            field=models.JSONField(
+                blank=True,
+                help_text="AI javobi uchun sarflangan tokenlar (input/output/total).",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:05
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+import apps.shared.encoders.encoder
+
+
+def _epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def iso_to_epoch(apps, schema_editor):
+    UserContext = apps.get_model("chat", "UserContext")
+    batch = []
+    for ctx in UserContext.objects.only("id", "data").iterator(chunk_size=500):
+        data = ctx.data or {}
+        for meta in data.values():
+            meta["expires_at"] = _epoch(meta.get("expires_at"))
+            meta["updated_at"] = _epoch(meta.get("updated_at"))
+        expiries = [m["expires_at"] for m in data.values() if m["expires_at"]]
+        ctx.data = data
+        ctx.earliest_expiry = min(expiries) if expiries else None
+        batch.append(ctx)
+        if len(batch) >= 500:
+            UserContext.objects.bulk_update(batch, ["data", "earliest_expiry"])
+            batch = []
+    if batch:
+        UserContext.objects.bulk_update(batch, ["data", "earliest_expiry"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_message_usage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usercontext",
+            name="earliest_expiry",
+            field=models.FloatField(
+                blank=True,
+                help_text="Eng yaqin muddati tugaydigan kalitning vaqti (epoch soniya).",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="usercontext",
+            name="data",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                encoder=apps.shared.encoders.encoder.CompactJSONEncoder,
+                help_text="AI uchun foydalanuvchi ma'lumotlari.",
+            ),
+        ),
+        migrations.RunPython(iso_to_epoch, migrations.RunPython.noop),
+    ]
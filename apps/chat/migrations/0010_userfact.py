@@ -0,0 +1,155 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:40
+
+from datetime import datetime, timedelta, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone as dj_timezone
+
+import apps.shared.encoders.encoder
+
+BATCH_SIZE = 1000
+DEFAULT_TTL_DAYS = int(getattr(settings, "CHAT_DEFAULT_TTL_DAYS", 30))
+
+
+def _datetime(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def copy_context_to_facts(apps, schema_editor):
+    UserContext = apps.get_model("chat", "UserContext")
+    UserFact = apps.get_model("chat", "UserFact")
+    now = dj_timezone.now()
+    facts = []
+    for ctx in UserContext.objects.only("user_id", "data").iterator(chunk_size=500):
+        for key, meta in (ctx.data or {}).items():
+            if not isinstance(meta, dict):
+                continue
+            expires_at = _datetime(meta.get("expires_at"))
+            if expires_at and expires_at <= now:
+                continue
+            if expires_at is None and not meta.get("persistent"):
+                # Unparseable expiry: keep the fact for the default TTL.
+                expires_at = now + timedelta(days=DEFAULT_TTL_DAYS)
+            facts.append(
+                UserFact(
+                    user_id=ctx.user_id,
+                    key=str(key)[:64],
+                    value=meta.get("value"),
+                    priority=int(meta.get("priority") or 0),
+                    source=meta.get("source") or "ai",
+                    expires_at=expires_at,
+                )
+            )
+            if len(facts) >= BATCH_SIZE:
+                UserFact.objects.bulk_create(facts, ignore_conflicts=True)
+                facts = []
+    if facts:
+        UserFact.objects.bulk_create(facts, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0009_usercontext_epoch_expiry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserFact",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "key",
+                    models.CharField(
+                        help_text="Fakt kaliti (masalan, name).", max_length=64
+                    ),
+                ),
+                (
+                    "value",
+                    models.JSONField(
+                        encoder=apps.shared.encoders.encoder.CompactJSONEncoder,
+                        help_text="Fakt qiymati.",
+                    ),
+                ),
+                (
+                    "priority",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Ustuvorlik: kattaroq qiymat kichigini almashtiradi.",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(default="ai", help_text="Manba.", max_length=32),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Muddati (bo'sh bo'lsa doimiy).",
+                        null=True,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="Fakt tegishli bo'lgan foydalanuvchi.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "User Fact",
+                "verbose_name_plural": "User Facts",
+                "db_table": "user_facts",
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at"], name="user_facts_expires_at_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "key"), name="user_facts_user_key_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_context_to_facts, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="usercontext",
+            name="earliest_expiry",
+        ),
+        migrations.AlterField(
+            model_name="usercontext",
+            name="data",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                encoder=apps.shared.encoders.encoder.CompactJSONEncoder,
+                help_text="Eski format: faktlar endi UserFact jadvalida saqlanadi.",
+            ),
+        ),
+    ]
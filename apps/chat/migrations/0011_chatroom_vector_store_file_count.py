@@ -0,0 +1,54 @@
+# Generated by Django 5.1.5 on 2026-10-17 13:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BATCH_SIZE = 1000
+
+
+def count_attached_files(apps, schema_editor):
+    """
+    Approximate the ready files of existing stores by their attached uploads.
+
+    ``reclaim_vector_stores`` replaces this with the counts reported by OpenAI.
+    """
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+    last_id = 0
+    while True:
+        chats = list(
+            ChatRoom.objects.filter(id__gt=last_id, vector_store_id__isnull=False)
+            .order_by("id")
+            .annotate(
+                files=Count(
+                    "messages__file__file_id",
+                    filter=Q(messages__file__file_id__isnull=False),
+                    distinct=True,
+                )
+            )
+            .only("id")[:BATCH_SIZE]
+        )
+        if not chats:
+            break
+        last_id = chats[-1].id
+        for chat in chats:
+            chat.vector_store_file_count = chat.files
+        ChatRoom.objects.bulk_update(chats, ["vector_store_file_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0010_userfact"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatroom",
+            name="vector_store_file_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Vector store'dagi qidirishga tayyor fayllar soni.",
+            ),
+        ),
+        migrations.RunPython(count_attached_files, migrations.RunPython.noop),
+    ]
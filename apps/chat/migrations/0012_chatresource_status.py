@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+def set_existing_status(apps, schema_editor):
+    """Files uploaded before the pipeline were sent to their vector store already."""
+    ChatResource = apps.get_model("chat", "ChatResource")
+    ChatResource.objects.filter(file_id__isnull=False).update(status="ready")
+    ChatResource.objects.filter(file_id__isnull=True).update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0011_chatroom_vector_store_file_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatresource",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("uploaded", "Uploaded"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                help_text="Faylning OpenAI'ga yuklanish va indekslanish holati.",
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(set_existing_status, migrations.RunPython.noop),
+    ]
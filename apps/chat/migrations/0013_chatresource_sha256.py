@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0012_chatresource_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatresource",
+            name="sha256",
+            field=models.CharField(
+                blank=True,
+                help_text="Fayl mazmunining SHA-256 xeshi.",
+                max_length=64,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatresource",
+            name="reuse_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Shu fayl qayta yuklanib, qayta ishlatilgan marta.",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatresource",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("sha256__isnull", False)),
+                fields=("user", "sha256"),
+                name="chat_resources_user_sha256_uniq",
+            ),
+        ),
+    ]
@@ -1,14 +1,17 @@
+import json
 import mimetypes
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
+from typing import Optional, Tuple
 
 from django.conf import settings
-from django.db import models
+from django.db import connection, models
 from django.utils import timezone as dj_timezone
 from django.utils.translation import gettext_lazy as _
 
-from apps.shared.encoders.encoder import PrettyJSONEncoder
+from apps.chat.enums.file import FileStatus
+from apps.shared.encoders.encoder import CompactJSONEncoder
 from apps.shared.models.base import AbstractBaseModel
-from apps.shared.utils.logger import logger
+from apps.shared.utils.upload import file_sha256
 
 DEFAULT_TTL_DAYS = int(getattr(settings, "CHAT_DEFAULT_TTL_DAYS", 30))
 
@@ -41,16 +44,44 @@ class ChatResource(AbstractBaseModel):
         help_text="OpenAI fayl ID.",
         db_index=True,
     )
+    status = models.CharField(
+        max_length=16,
+        choices=FileStatus.choices,
+        default=FileStatus.PENDING,
+        help_text="Faylning OpenAI'ga yuklanish va indekslanish holati.",
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="Fayl mazmunining SHA-256 xeshi.",
+    )
+    reuse_count = models.PositiveIntegerField(
+        default=0, help_text="Shu fayl qayta yuklanib, qayta ishlatilgan marta."
+    )
 
     def __str__(self):
         return str(self.file.name)
 
     def save(self, *args, **kwargs):
-        self.size = self.file.size
-        self.type, _ = mimetypes.guess_type(self.file.name)
-        self.name = self.file.name
+        # Metadata of the stored file never changes, so it is taken once.
+        if self._state.adding:
+            self.size = self.file.size
+            self.type, _ = mimetypes.guess_type(self.file.name)
+            self.name = self.file.name
+            if not self.sha256:
+                self.sha256 = file_sha256(self.file)
         super().save(*args, **kwargs)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "sha256"],
+                condition=models.Q(sha256__isnull=False),
+                name="chat_resources_user_sha256_uniq",
+            ),
+        ]
+
 
 class ChatRoom(AbstractBaseModel):
     name = models.CharField(
@@ -78,6 +109,18 @@ class ChatRoom(AbstractBaseModel):
         null=True,
         help_text="Vector stores id.",
     )
+    vector_store_file_count = models.PositiveIntegerField(
+        default=0, help_text="Vector store'dagi qidirishga tayyor fayllar soni."
+    )
+    user_message_count = models.PositiveIntegerField(
+        default=0, help_text="Foydalanuvchi xabarlari soni."
+    )
+    ai_message_count = models.PositiveIntegerField(
+        default=0, help_text="AI javoblari soni."
+    )
+    last_message_at = models.DateTimeField(
+        default=dj_timezone.now, help_text="Oxirgi xabar vaqti."
+    )
 
     def __str__(self):
         return f"Chat {self.id} - {self.participant.email}"
@@ -87,6 +130,13 @@ class ChatRoom(AbstractBaseModel):
         verbose_name_plural = _("Chat Rooms")
         ordering = ["-updated_at"]
         db_table = "chat_rooms"
+        indexes = [
+            # ChatRoomList: participant's chats, most recent activity first.
+            models.Index(
+                fields=["participant", "-last_message_at", "-id"],
+                name="chat_rooms_part_last_msg_idx",
+            ),
+        ]
 
 
 class Message(AbstractBaseModel):
@@ -114,6 +164,15 @@ class Message(AbstractBaseModel):
     openai_response_id = models.CharField(
         max_length=128, null=True, blank=True, db_index=True
     )
+    truncated = models.BooleanField(
+        default=False,
+        help_text="Javob foydalanuvchi tomonidan to'xtatilgan (to'liq emas).",
+    )
+    usage = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="AI javobi uchun sarflangan tokenlar (input/output/total).",
+    )
 
     def __str__(self):
         return f"{self.message[:30] if self.message else 'File Message'}"
@@ -123,6 +182,19 @@ class Message(AbstractBaseModel):
         verbose_name_plural = _("Messages")
         ordering = ["created_at"]
         db_table = "messages"
+        indexes = [
+            # MessageList: a chat's history in (created_at, id) keyset order.
+            models.Index(
+                fields=["chat", "created_at", "id"],
+                name="messages_chat_created_idx",
+            ),
+            # AI answers of a chat (context extraction, counter reconciliation).
+            models.Index(
+                fields=["chat", "created_at"],
+                condition=models.Q(sender__isnull=True),
+                name="messages_chat_ai_idx",
+            ),
+        ]
 
 
 class UserContext(AbstractBaseModel):
@@ -132,157 +204,186 @@ class UserContext(AbstractBaseModel):
     data = models.JSONField(
         default=dict,
         blank=True,
-        encoder=PrettyJSONEncoder,
-        help_text="AI uchun foydalanuvchi ma'lumotlari.",
+        encoder=CompactJSONEncoder,
+        help_text="Eski format: faktlar endi UserFact jadvalida saqlanadi.",
     )
 
-    def _now(self):
-        return dj_timezone.now()
-
-    def _iso(self, dt):
-        if not dt:
-            return None
-        return dt.isoformat()
-
     def get_valid_context(self) -> dict:
         """
         Return a simple dict of key->value for non-expired entries.
         """
-        now = self._now()
-        result = {}
-        changed = False
-        for k, meta in (self.data or {}).items():
-            expires = meta.get("expires_at")
-            if expires:
-                try:
-                    exp_dt = datetime.fromisoformat(expires)
-                    if exp_dt.tzinfo is None:
-                        exp_dt = exp_dt.replace(tzinfo=timezone.utc)
-                except Exception as e:
-                    logger.warning(f"Failed to parse expires_at for key {k}: {e}")
-                    exp_dt = None
-            else:
-                exp_dt = None
-
-            if exp_dt and exp_dt < now:
-                changed = True
-                continue
-
-            result[k] = meta.get("value")
-        if changed:
-            # optionally prune expired entries from stored data (non-blocking)
-            self.prune_expired()  # uncomment if you want immediate pruning
-            pass
-        return result
+        values, _ = UserFact.valid_context(self.user_id)
+        return values
 
-    def prune_expired(self) -> None:
+    def update_context(
+        self,
+        incoming: dict,
+        *,
+        source: str = "ai",
+        ttl_overrides: dict = None,
+        persistent_keys: set = None,
+        priority_map: dict = None,
+    ) -> None:
         """
-        Permanently remove expired keys from `self.data`.
+        Merge incoming dict of facts into saved context (see ``UserFact.upsert``).
         """
-        now = self._now()
-        new = {}
-        changed = False
-        for k, meta in (self.data or {}).items():
-            expires = meta.get("expires_at")
-            if expires:
-                try:
-                    exp_dt = datetime.fromisoformat(expires)
-                    if exp_dt.tzinfo is None:
-                        exp_dt = exp_dt.replace(tzinfo=timezone.utc)
-                except Exception as e:
-                    logger.warning(f"Failed to parse expires_at for key {k}: {e}")
-                    exp_dt = None
-            else:
-                exp_dt = None
+        UserFact.upsert(
+            self.user_id,
+            incoming,
+            source=source,
+            ttl_overrides=ttl_overrides,
+            persistent_keys=persistent_keys,
+            priority_map=priority_map,
+        )
+
+    def __str__(self):
+        return f"Context for {self.user.email}"
 
-            if exp_dt and exp_dt < now:
-                changed = True
-                continue
-            new[k] = meta
-        if changed:
-            self.data = new
-            self.save(update_fields=["data"])
+    class Meta:
+        verbose_name = _("User Context")
+        verbose_name_plural = _("User Contexts")
+        db_table = "user_contexts"
 
-    def update_context(
-        self,
+
+class UserFact(AbstractBaseModel):
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="facts",
+        help_text="Fakt tegishli bo'lgan foydalanuvchi.",
+    )
+    key = models.CharField(max_length=64, help_text="Fakt kaliti (masalan, name).")
+    value = models.JSONField(encoder=CompactJSONEncoder, help_text="Fakt qiymati.")
+    priority = models.IntegerField(
+        default=0, help_text="Ustuvorlik: kattaroq qiymat kichigini almashtiradi."
+    )
+    source = models.CharField(max_length=32, default="ai", help_text="Manba.")
+    expires_at = models.DateTimeField(
+        null=True, blank=True, help_text="Muddati (bo'sh bo'lsa doimiy)."
+    )
+
+    @classmethod
+    def valid_context(cls, user_id: int) -> Tuple[dict, Optional[float]]:
+        """
+        Non-expired facts of a user as ``{key: value}`` plus the earliest expiry
+        among them (epoch seconds), in one indexed query.
+        """
+        rows = (
+            cls.objects.filter(user_id=user_id)
+            .filter(
+                models.Q(expires_at__isnull=True)
+                | models.Q(expires_at__gt=dj_timezone.now())
+            )
+            .values_list("key", "value", "expires_at")
+        )
+        values = {}
+        earliest = None
+        for key, value, expires_at in rows:
+            values[key] = value
+            if expires_at and (earliest is None or expires_at < earliest):
+                earliest = expires_at
+        return values, earliest.timestamp() if earliest else None
+
+    @classmethod
+    def upsert(
+        cls,
+        user_id: int,
         incoming: dict,
         *,
         source: str = "ai",
         ttl_overrides: dict = None,
         persistent_keys: set = None,
         priority_map: dict = None,
-    ) -> None:
+        statements: set = None,
+    ) -> int:
         """
-        Merge incoming dict of facts into saved context.
+        Insert or update facts in a single statement.
 
         incoming: {"name": "Jahongir", "likes": ["tea", "coffee"]}
         ttl_overrides: {"likes": 7}  # days TTL per key
         persistent_keys: set(["name"])  # keys that shouldn't expire (persistent)
         priority_map: {"name": 100}  # bigger -> higher priority (used for conflict resolution)
-        """
-        if ttl_overrides is None:
-            ttl_overrides = {}
-        if persistent_keys is None:
-            persistent_keys = set()
-        if priority_map is None:
-            priority_map = {}
+        statements: set(["name"])  # keys the user stated outright in this message
 
-        now = self._now()
-        data = self.data or {}
+        A stored fact is only replaced by one with the same or a higher priority,
+        unless it has expired; keys missing from ``priority_map`` have priority 0.
+        Regex facts (``source="local"``) never replace a live AI-extracted fact,
+        except for keys in ``statements`` ("My name is ...").
+        Returns the number of inserted or updated rows.
+        """
+        ttl_overrides = ttl_overrides or {}
+        persistent_keys = persistent_keys or set()
+        priority_map = priority_map or {}
+        statements = [str(key)[:64] for key in statements or ()]
 
+        now = dj_timezone.now()
+        rows = {}
         for key, value in incoming.items():
-            # canonicalize simple types -> keep as-is
-            existing = data.get(key)
-            existing_priority = existing.get("priority", 0) if existing else 0
-            new_priority = priority_map.get(key, existing_priority or 0)
-
+            key = str(key)[:64]
+            priority = priority_map.get(key, 0)
             # If incoming has explicit priority (rare), allow it
             if isinstance(value, dict) and "value" in value and "priority" in value:
-                # accept a structured incoming entry
-                v = value["value"]
-                new_priority = value.get("priority", new_priority)
-            else:
-                v = value
-
-            if existing and existing_priority > new_priority:
-                expires = existing.get("expires_at")
-                expired = False
-                if expires:
-                    try:
-                        exp_dt = datetime.fromisoformat(expires)
-                        if exp_dt.tzinfo is None:
-                            exp_dt = exp_dt.replace(tzinfo=timezone.utc)
-                        expired = exp_dt < now
-                    except Exception as e:
-                        logger.warning(f"Failed to parse expires_at for key {key}: {e}")
-                        expired = False
-                if not expired:
-                    continue
-
+                priority = value["priority"]
+                value = value["value"]
             if key in persistent_keys:
                 expires_at = None
-                persistent = True
             else:
                 days = ttl_overrides.get(key, DEFAULT_TTL_DAYS)
-                expires_at = (now + timedelta(days=int(days))).isoformat()
-                persistent = False
-
-            data[key] = {
-                "value": v,
-                "updated_at": now.isoformat(),
-                "expires_at": expires_at,
-                "persistent": bool(persistent),
-                "priority": int(new_priority),
-                "source": source,
-            }
-
-        self.data = data
-        self.save(update_fields=["data"])
+                expires_at = now + timedelta(days=int(days))
+            rows[key] = (
+                user_id,
+                key,
+                json.dumps(value, cls=CompactJSONEncoder),
+                int(priority),
+                source,
+                expires_at,
+                now,
+                now,
+            )
+        if not rows:
+            return 0
+
+        table = cls._meta.db_table
+        values_sql = ", ".join(["(%s, %s, %s::jsonb, %s, %s, %s, %s, %s)"] * len(rows))
+        sql = f"""
+            INSERT INTO {table} AS f
+                (user_id, key, value, priority, source, expires_at, created_at, updated_at)
+            VALUES {values_sql}
+            ON CONFLICT (user_id, key) DO UPDATE SET
+                value = EXCLUDED.value,
+                priority = EXCLUDED.priority,
+                source = EXCLUDED.source,
+                expires_at = EXCLUDED.expires_at,
+                updated_at = EXCLUDED.updated_at
+            WHERE (
+                    f.priority <= EXCLUDED.priority
+                    AND NOT (
+                        f.source = 'ai'
+                        AND EXCLUDED.source = 'local'
+                        AND NOT EXCLUDED.key = ANY(%s::text[])
+                    )
+                )
+               OR f.expires_at <= EXCLUDED.updated_at
+        """
+        params = [param for row in rows.values() for param in row]
+        params.append(statements)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
 
     def __str__(self):
-        return f"Context for {self.user.email}"
+        return f"{self.key} for user {self.user_id}"
 
     class Meta:
-        verbose_name = _("User Context")
-        verbose_name_plural = _("User Contexts")
-        db_table = "user_contexts"
+        verbose_name = _("User Fact")
+        verbose_name_plural = _("User Facts")
+        db_table = "user_facts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="user_facts_user_key_uniq"
+            ),
+        ]
+        indexes = [
+            # Purge job: DELETE ... WHERE expires_at <= now().
+            models.Index(fields=["expires_at"], name="user_facts_expires_at_idx"),
+        ]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from apps.chat.models.chat import ChatRoom, Message, ChatResource
+from apps.shared.serializers.dynamic import DynamicFieldsModelSerializer
+from apps.users.models.users import User
 from apps.users.serializers.me import MeSerializer
 
 
@@ -14,9 +16,10 @@ class ChatResourceSerializer(serializers.ModelSerializer):
             "file",
             "size",
             "type",
+            "status",
             "created_at",
         )
-        read_only_fields = ("user", "name", "size", "type", "created_at")
+        read_only_fields = ("user", "name", "size", "type", "status", "created_at")
 
 
 class ChatRoomSerializer(serializers.ModelSerializer):
@@ -25,10 +28,17 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "name",
+            "last_message_at",
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("name", "created_at", "updated_at", "id")
+        read_only_fields = (
+            "name",
+            "last_message_at",
+            "created_at",
+            "updated_at",
+            "id",
+        )
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -44,6 +54,43 @@ class MessageSerializer(serializers.ModelSerializer):
             "sender",
             "message",
             "file",
+            "truncated",
             "created_at",
             "updated_at",
         )
+
+
+class MessageSenderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ("id", "first_name", "last_name", "avatar")
+
+
+class MessageHistorySerializer(DynamicFieldsModelSerializer):
+    """
+    Message representation for chat history pages.
+
+    The chat is returned once in the response envelope instead of on every row;
+    the view selects/prefetches ``sender`` and ``file`` so a page costs a constant
+    number of queries.
+    """
+
+    sender = MessageSenderSerializer(read_only=True)
+    file = ChatResourceSerializer(read_only=True, many=True)
+    is_ai = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Message
+        fields = (
+            "id",
+            "sender",
+            "is_ai",
+            "message",
+            "file",
+            "truncated",
+            "created_at",
+            "updated_at",
+        )
+
+    def get_is_ai(self, obj) -> bool:
+        return obj.sender_id is None
@@ -1,39 +1,35 @@
 import json
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 from django.conf import settings
-from openai import AsyncOpenAI, AsyncStream
+from openai import AsyncOpenAI, AsyncStream, NotFoundError
 from openai.types.responses import ResponseStreamEvent, FileSearchToolParam
 from openai.types.vector_store_create_params import ExpiresAfter
 
 from apps.chat.models.chat import ChatRoom
+from apps.chat.services.client import get_openai_client
 from apps.shared.utils.logger import logger
 
 
 class AIService:
-    def __init__(self):
-        self.MODEL_CHEAP = getattr(settings, "OPENAI_MODEL_CHEAP", "gpt-4o-mini")
-        self.MODEL_MID = getattr(settings, "OPENAI_MODEL_MID", "gpt-4o-mini")
-        self.MODEL_SMART = getattr(settings, "OPENAI_MODEL_SMART", "gpt-4o-mini")
+    """
+    Thin wrapper around the process-wide OpenAI client.
 
-        self.DEFAULT_CONTEXT_MAX_CHARS = int(
-            getattr(settings, "CHAT_CONTEXT_MAX_CHARS", 1500)
-        )
-        self.DEFAULT_EXTRACT_TOKENS = int(
-            getattr(settings, "CHAT_EXTRACT_MAX_TOKENS", 200)
-        )
-        self.DEFAULT_RESPONSE_TOKENS = int(
-            getattr(settings, "CHAT_RESPONSE_MAX_TOKENS", 2000)
-        )
+    Instances hold no connections of their own, so creating one is cheap; every
+    call goes through the shared, pooled client of the running event loop.
+    """
 
-        self.client: AsyncOpenAI = self._get_openai_client()
+    MODEL_CHEAP = getattr(settings, "OPENAI_MODEL_CHEAP", "gpt-4o-mini")
+    MODEL_MID = getattr(settings, "OPENAI_MODEL_MID", "gpt-4o-mini")
+    MODEL_SMART = getattr(settings, "OPENAI_MODEL_SMART", "gpt-4o-mini")
 
-    @staticmethod
-    def _get_openai_client() -> AsyncOpenAI:
-        api_key = getattr(settings, "OPENAI_API_KEY", None)
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY is not set in settings.")
-        return AsyncOpenAI(api_key=api_key)
+    DEFAULT_CONTEXT_MAX_CHARS = int(getattr(settings, "CHAT_CONTEXT_MAX_CHARS", 1500))
+    DEFAULT_EXTRACT_TOKENS = int(getattr(settings, "CHAT_EXTRACT_MAX_TOKENS", 200))
+    DEFAULT_RESPONSE_TOKENS = int(getattr(settings, "CHAT_RESPONSE_MAX_TOKENS", 2000))
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_openai_client()
 
     async def _responses_create_safe(self, **kwargs) -> Any:
         try:
@@ -58,7 +54,9 @@ class AIService:
             return ""
         return text[:max_chars]
 
-    async def extract_user_context(self, new_message: str) -> Dict[str, Any]:
+    async def extract_user_context(
+        self, new_message: str, max_chars: int = 1000
+    ) -> Dict[str, Any]:
         persistent_keys = set(
             getattr(settings, "CHAT_PERSISTENT_KEYS", {"name", "email"})
         )
@@ -70,27 +68,24 @@ class AIService:
         )
         input_messages = [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": self.truncate_text(new_message, 1000)},
+            {"role": "user", "content": self.truncate_text(new_message, max_chars)},
         ]
-        try:
-            completion = await self._responses_create_safe(
-                model=self.MODEL_MID,
-                input=input_messages,
-                max_output_tokens=self.DEFAULT_EXTRACT_TOKENS,
-                text={
-                    "format": {"type": "json_object"},
-                    "verbosity": "medium",
-                },
-            )
-            response = (
-                completion.output[0].content[0].text
-                if hasattr(completion, "output")
-                else completion
-            )
-            return response or {}
-        except Exception as e:
-            logger.warning(f"Context extraction failed: {e}")
-            return {}
+        # Errors are left to the caller: the extraction task retries on them.
+        completion = await self._responses_create_safe(
+            model=self.MODEL_MID,
+            input=input_messages,
+            max_output_tokens=self.DEFAULT_EXTRACT_TOKENS,
+            text={
+                "format": {"type": "json_object"},
+                "verbosity": "medium",
+            },
+        )
+        response = (
+            completion.output[0].content[0].text
+            if hasattr(completion, "output")
+            else completion
+        )
+        return response or {}
 
     async def generate_response(
         self,
@@ -119,18 +114,23 @@ class AIService:
             {"role": "user", "content": self.truncate_text(user_message, 1500)},
         ]
 
+        options: Dict[str, Any] = {}
+        if vector_store_id:
+            # Only chats whose store has ready files pay for the file_search tool.
+            options["tools"] = [
+                FileSearchToolParam(
+                    type="file_search",
+                    vector_store_ids=[vector_store_id],
+                )
+            ]
+
         completion = await self._responses_create_safe(
             model=self.MODEL_SMART,
             input=input_messages,
             max_output_tokens=self.DEFAULT_RESPONSE_TOKENS,
             conversation=chat.conversation_id,
             stream=True,
-            tools=[
-                FileSearchToolParam(
-                    type="file_search",
-                    vector_store_ids=[vector_store_id],
-                )
-            ],
+            **options,
         )
 
         return completion
@@ -185,13 +185,42 @@ class AIService:
 
     async def add_file_to_vector_store(
         self, chat: ChatRoom, file_ids: List[str]
-    ) -> bool:
+    ) -> Optional[Tuple[int, List[str]]]:
+        """
+        Add ``file_ids`` in one batch and wait until they are processed.
+
+        Returns the number of the store's files ready for search and the ids of
+        the batch's files that failed, or None if the batch could not be added.
+        """
         try:
-            await self.client.vector_stores.file_batches.create(
+            batch = await self.client.vector_stores.file_batches.create_and_poll(
                 vector_store_id=chat.vector_store_id,
                 file_ids=file_ids,
             )
-            return True
+            failed: List[str] = []
+            if batch.file_counts.failed:
+                async for file in self.client.vector_stores.file_batches.list_files(
+                    batch.id, vector_store_id=chat.vector_store_id, filter="failed"
+                ):
+                    failed.append(file.id)
+                logger.warning(
+                    f"{len(failed)} of {len(file_ids)} files failed "
+                    f"in vector store {chat.vector_store_id}"
+                )
+            vector_store = await self.client.vector_stores.retrieve(
+                chat.vector_store_id
+            )
+            return vector_store.file_counts.completed, failed
         except Exception as e:
             logger.warning(f"Failed to add file to vector store: {e}")
+            return None
+
+    async def delete_vector_store(self, vector_store_id: str) -> bool:
+        try:
+            await self.client.vector_stores.delete(vector_store_id)
+            return True
+        except NotFoundError:
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete vector store {vector_store_id}: {e}")
             return False
@@ -1,12 +1,19 @@
-import json
 from typing import Any, Dict, List, Optional
 
-from channels.db import database_sync_to_async
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
-
-from apps.chat.models.chat import ChatRoom, Message, UserContext, ChatResource
-from apps.chat.services.ai import AIService
+from django.db.models import F
+
+from apps.chat.models.chat import ChatRoom, Message, ChatResource
+from apps.chat.services.context import context_update_options, user_context_store
+from apps.chat.services.extraction import (
+    COALESCE_WINDOW as EXTRACT_WINDOW,
+    context_extraction_queue,
+)
+from apps.chat.services.persister import get_message_persister
+from apps.chat.services.prefilter import fact_prefilter
+from apps.chat.tasks.context import extract_user_context
+from apps.chat.tasks.vector_store import add_files_to_vector_store
 from apps.shared.utils.logger import logger
 from apps.users.models.users import User
 
@@ -18,68 +25,89 @@ class ChatService:
         sender: Optional[User],
         text: str,
         file_ids: Optional[List[int]] = None,
+        truncated: bool = False,
+        openai_response_id: Optional[str] = None,
     ) -> Message:
         """
         Save a message to a chat room. Supports ManyToMany file attachments.
-        Ensures that attached files belong to the sender.
+        Ensures that attached files belong to the sender; the files are added to
+        the chat's vector store by a background task.
+        ``truncated`` marks AI answers that were stopped before completion.
+        ``openai_response_id`` is stored with the row instead of a second UPDATE.
         """
         try:
-            if file_ids:
-                allowed = await ChatService.check_files_allowed(sender, file_ids)
-                if not allowed:
-                    raise PermissionError(
-                        "Some attached files do not belong to this user."
-                    )
-
             sender_instance = (
                 sender if sender and not isinstance(sender, AnonymousUser) else None
             )
+            attachments = (
+                await ChatService.resolve_attachments(sender_instance, file_ids)
+                if file_ids
+                else {}
+            )
+
+            if sender_instance is not None:
+                # AI answers are written behind; store them before this message.
+                await get_message_persister().drain(chat.id)
 
-            message = await database_sync_to_async(Message.objects.create)(
+            message = await Message.objects.acreate(
                 chat=chat,
                 sender=sender_instance,
                 message=text,
+                truncated=truncated,
+                openai_response_id=openai_response_id,
             )
 
-            if file_ids:
-                await database_sync_to_async(message.file.set)(file_ids)
-
-            ai_file_ids = (
-                await database_sync_to_async(
-                    lambda: list(
-                        ChatResource.objects.filter(id__in=file_ids).values_list(
-                            "file_id", flat=True
-                        )
-                    )
-                )()
-                if file_ids
-                else []
-            )
-            if file_ids:
-                await AIService().add_file_to_vector_store(
-                    chat=chat, file_ids=ai_file_ids
+            await ChatService.bump_counters(chat, message)
+
+            if attachments:
+                through = Message.file.through
+                await through.objects.abulk_create(
+                    [
+                        through(message_id=message.id, chatresource_id=resource_id)
+                        for resource_id in attachments
+                    ]
                 )
+                # The task waits for attachments that are still being uploaded.
+                await sync_to_async(
+                    add_files_to_vector_store.delay, thread_sensitive=False
+                )(chat.id, list(attachments))
             return message
         except Exception as e:
             logger.error(f"Failed to save message: {e}")
             raise
 
+    @staticmethod
+    async def bump_counters(chat: ChatRoom, message: Message) -> None:
+        """
+        Atomically increment the chat's message counter and move ``last_message_at``.
+        The in-memory ``chat`` instance is updated as well.
+        """
+        field = (
+            "ai_message_count" if message.sender_id is None else "user_message_count"
+        )
+        await ChatRoom.objects.filter(id=chat.id).aupdate(
+            **{field: F(field) + 1, "last_message_at": message.created_at}
+        )
+        setattr(chat, field, getattr(chat, field) + 1)
+        chat.last_message_at = message.created_at
+
     @staticmethod
     async def should_update_context(chat: ChatRoom) -> bool:
-        total_messages = await database_sync_to_async(
-            lambda: Message.objects.filter(chat=chat, sender__isnull=True).count()
-        )()
-        return total_messages <= 5
+        return chat.ai_message_count <= 5
 
     @staticmethod
     async def get_user_context(user: User) -> Dict[str, Any]:
-        ctx_obj, _ = await database_sync_to_async(UserContext.objects.get_or_create)(
-            user=user
-        )
-        return await database_sync_to_async(ctx_obj.get_valid_context)()
+        return await user_context_store.get(user)
 
     @staticmethod
-    async def update_context(user: User, new_message: str, ai: AIService) -> None:
+    async def update_context(user: User, new_message: str) -> None:
+        """
+        Queue ``new_message`` for user-context extraction on Celery.
+
+        Messages of the same user are coalesced into one extraction call; see
+        ``ContextExtractionQueue``. The local prefilter stores trivially
+        structured facts itself and skips messages that contain none.
+        """
         try:
             allow_storage = getattr(user, "allow_memory_storage", True)
         except Exception as e:
@@ -92,34 +120,25 @@ class ChatService:
             )
             return
 
-        parsed = await ai.extract_user_context(new_message)
-
-        try:
-            parsed = json.loads(parsed) if isinstance(parsed, str) else parsed
-        except json.JSONDecodeError:
-            logger.debug(f"User {user.id} profile is invalid JSON: {parsed}")
-            return
-
-        if not parsed or not isinstance(parsed, dict):
-            logger.debug(f"User {user.id} has no profile: {parsed}")
-            return
-
-        persistent_keys = set(
-            getattr(settings, "CHAT_PERSISTENT_KEYS", {"name", "email"})
+        result = fact_prefilter.classify(new_message)
+        if result.facts:
+            await user_context_store.update(
+                user,
+                result.facts,
+                source="local",
+                statements=result.statements,
+                **context_update_options(),
+            )
+        await context_extraction_queue.record_prefilter(
+            skipped=not result.should_extract, local_facts=len(result.facts)
         )
-        ttl_overrides = getattr(settings, "CHAT_TTL_OVERRIDES", {}) or {}
-        priority_map = getattr(settings, "CHAT_PRIORITY_MAP", {})
+        if not result.should_extract:
+            return
 
-        ctx_obj, _ = await database_sync_to_async(UserContext.objects.get_or_create)(
-            user=user
-        )
-        await database_sync_to_async(ctx_obj.update_context)(
-            parsed,
-            source="ai",
-            ttl_overrides=ttl_overrides,
-            persistent_keys=persistent_keys,
-            priority_map=priority_map,
-        )
+        if await context_extraction_queue.enqueue(user.id, new_message):
+            await sync_to_async(
+                extract_user_context.apply_async, thread_sensitive=False
+            )(args=[user.id], countdown=EXTRACT_WINDOW)
 
     @staticmethod
     async def update_chat_name(chat: ChatRoom, new_title: str) -> None:
@@ -127,29 +146,30 @@ class ChatService:
         Update the name of a chat room asynchronously.
         """
 
-        def _update():
-            chat.name = new_title
-            chat.save(update_fields=["name"])
-
-        await database_sync_to_async(_update)()
+        await ChatRoom.objects.filter(id=chat.id).aupdate(name=new_title)
+        chat.name = new_title
 
     @staticmethod
-    async def check_files_allowed(
-        user: Optional[User], file_ids: Optional[List[int]]
-    ) -> bool:
-        if not file_ids or not user or isinstance(user, AnonymousUser):
-            return True
-
-        def _check() -> bool:
-            try:
-                owned_count = ChatResource.objects.filter(
-                    user=user, id__in=file_ids
-                ).count()
-                return owned_count == len(file_ids)
-            except Exception as e:
-                logger.warning(
-                    f"File access check failed for user {getattr(user, 'id', 'unknown')}: {e}"
-                )
-                return False
+    async def resolve_attachments(
+        user: Optional[User], file_ids: List[int]
+    ) -> Dict[int, Optional[str]]:
+        """
+        Map attached resource ids to their OpenAI ``file_id`` with one query.
 
-        return await database_sync_to_async(_check)()
+        Raises ``PermissionError`` if ``user`` is given and some of the files do not
+        exist or belong to someone else. Without a user (AI messages) unknown ids
+        are skipped.
+        """
+        requested = set(file_ids)
+        rows = [
+            row
+            async for row in ChatResource.objects.filter(id__in=requested).values_list(
+                "id", "user_id", "file_id"
+            )
+        ]
+        if user is not None and (
+            len(rows) != len(requested)
+            or any(owner_id != user.id for _, owner_id, _ in rows)
+        ):
+            raise PermissionError("Some attached files do not belong to this user.")
+        return {resource_id: file_id for resource_id, _, file_id in rows}
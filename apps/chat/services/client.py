@@ -0,0 +1,119 @@
+import asyncio
+import weakref
+from typing import Any, Dict
+
+import httpx
+from django.conf import settings
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from apps.shared.utils.logger import logger
+
+MAX_CONNECTIONS = int(getattr(settings, "OPENAI_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(
+    getattr(settings, "OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+)
+KEEPALIVE_EXPIRY = float(getattr(settings, "OPENAI_KEEPALIVE_EXPIRY", 30))
+TIMEOUT = float(getattr(settings, "OPENAI_TIMEOUT", 120))
+MAX_RETRIES = int(getattr(settings, "OPENAI_MAX_RETRIES", 2))
+HTTP2 = bool(getattr(settings, "OPENAI_HTTP2", False))
+
+# One client (and one httpx connection pool) per event loop: httpx connections
+# are bound to the loop they were opened on.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http2_enabled() -> bool:
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("OPENAI_HTTP2 is enabled but the 'h2' package is missing.")
+        return False
+    return True
+
+
+def _build_client() -> AsyncOpenAI:
+    api_key = getattr(settings, "OPENAI_API_KEY", None)
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set in settings.")
+
+    http_client = DefaultAsyncHttpxClient(
+        http2=_http2_enabled(),
+        timeout=httpx.Timeout(TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=api_key, http_client=http_client, max_retries=MAX_RETRIES
+    )
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed():
+        client = _build_client()
+        _clients[loop] = client
+    return client
+
+
+async def warm_up_openai_client() -> None:
+    """Open the first pooled connection (DNS + TLS) before traffic arrives."""
+    try:
+        await get_openai_client().models.list()
+        logger.info(f"OpenAI client warmed up: {openai_pool_stats()}")
+    except Exception as e:
+        logger.warning(f"OpenAI client warm-up failed: {e}")
+
+
+async def close_openai_client() -> None:
+    """Close the client of the running event loop, releasing pooled connections."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        logger.info(f"Closing OpenAI client: {openai_pool_stats(client)}")
+        await client.close()
+
+
+def _pool_stats(client: AsyncOpenAI) -> Dict[str, int]:
+    # httpx does not expose pool metrics publicly; read them from httpcore.
+    transport = getattr(client._client, "_transport", None)
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for conn in connections if conn.is_idle())
+    return {
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "queued_requests": len(getattr(pool, "_requests", []) or []),
+    }
+
+
+def openai_pool_stats(client: AsyncOpenAI = None) -> Dict[str, Any]:
+    """Connection pool statistics for one client, or summed over every event loop."""
+    clients = [client] if client is not None else list(_clients.values())
+    totals: Dict[str, Any] = {
+        "clients": len(clients),
+        "connections": 0,
+        "idle": 0,
+        "active": 0,
+        "queued_requests": 0,
+    }
+    for c in clients:
+        try:
+            for key, value in _pool_stats(c).items():
+                totals[key] += value
+        except Exception as e:
+            logger.debug(f"Failed to read OpenAI pool stats: {e}")
+    totals.update(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        http2=_http2_enabled(),
+    )
+    return totals
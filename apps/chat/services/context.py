@@ -0,0 +1,135 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from apps.chat.models.chat import UserFact
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_async_redis
+
+CACHE_TTL = int(getattr(settings, "CHAT_CONTEXT_CACHE_TTL", 60 * 60))
+LOCAL_TTL = float(getattr(settings, "CHAT_CONTEXT_LOCAL_TTL", 30))
+LOCAL_MAX_SIZE = int(getattr(settings, "CHAT_CONTEXT_LOCAL_MAX_SIZE", 10_000))
+
+# (values, earliest_expiry, cached_until)
+_Entry = Tuple[Dict[str, Any], Optional[float], float]
+
+
+class UserContextStore:
+    """
+    Read-through cache of the valid user context.
+
+    Lookups go to a per-process LRU first, then Redis, then the database. Each
+    entry carries the earliest expiry of its keys, so checking whether it is still
+    valid is a single comparison. ``update`` writes the database and refreshes
+    Redis; other processes see the change once their local entry (kept at most
+    ``CHAT_CONTEXT_LOCAL_TTL`` seconds) runs out.
+    """
+
+    def __init__(self, max_size: int = LOCAL_MAX_SIZE):
+        self.max_size = max_size
+        self._local: "OrderedDict[int, _Entry]" = OrderedDict()
+
+    @staticmethod
+    def cache_key(user_id: int) -> str:
+        return f"user_context_{user_id}"
+
+    # ---------------------- local LRU ----------------------
+    def _get_local(self, user_id: int, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        values, earliest, cached_until = entry
+        if cached_until <= now or (earliest is not None and earliest <= now):
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return values
+
+    def _set_local(
+        self, user_id: int, values: Dict[str, Any], earliest: Optional[float]
+    ) -> None:
+        self._local[user_id] = (values, earliest, time.time() + LOCAL_TTL)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    # ---------------------- redis ----------------------
+    async def _get_shared(self, user_id: int, now: float) -> Optional[_Entry]:
+        try:
+            raw = await get_async_redis().get(self.cache_key(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to read cached context of user {user_id}: {e}")
+            return None
+        if not raw:
+            return None
+        payload = json.loads(raw)
+        earliest = payload.get("e")
+        if earliest is not None and earliest <= now:
+            return None
+        return payload["v"], earliest, now
+
+    async def _set_shared(
+        self, user_id: int, values: Dict[str, Any], earliest: Optional[float]
+    ) -> None:
+        ttl = CACHE_TTL
+        if earliest is not None:
+            ttl = max(1, min(ttl, int(earliest - time.time())))
+        payload = json.dumps({"v": values, "e": earliest}, separators=(",", ":"))
+        try:
+            await get_async_redis().set(self.cache_key(user_id), payload, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Failed to cache context of user {user_id}: {e}")
+
+    # ---------------------- public API ----------------------
+    async def get(self, user) -> Dict[str, Any]:
+        now = time.time()
+        values = self._get_local(user.id, now)
+        if values is not None:
+            return values
+
+        entry = await self._get_shared(user.id, now)
+        if entry is not None:
+            values, earliest, _ = entry
+            self._set_local(user.id, values, earliest)
+            return values
+
+        values, earliest = await database_sync_to_async(UserFact.valid_context)(user.id)
+        self._set_local(user.id, values, earliest)
+        await self._set_shared(user.id, values, earliest)
+        return values
+
+    async def update(self, user, incoming: Dict[str, Any], **options) -> None:
+        """Merge ``incoming`` into the stored context and refresh the caches."""
+
+        def _update() -> Tuple[Dict[str, Any], Optional[float]]:
+            UserFact.upsert(user.id, incoming, **options)
+            return UserFact.valid_context(user.id)
+
+        values, earliest = await database_sync_to_async(_update)()
+        self._set_local(user.id, values, earliest)
+        await self._set_shared(user.id, values, earliest)
+
+    async def invalidate(self, user_id: int) -> None:
+        self._local.pop(user_id, None)
+        try:
+            await get_async_redis().delete(self.cache_key(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate context of user {user_id}: {e}")
+
+
+def context_update_options() -> Dict[str, Any]:
+    """Settings-driven options for ``UserFact.upsert``/``UserContext.update_context``."""
+    return {
+        "ttl_overrides": getattr(settings, "CHAT_TTL_OVERRIDES", {}) or {},
+        "persistent_keys": set(
+            getattr(settings, "CHAT_PERSISTENT_KEYS", {"name", "email"})
+        ),
+        "priority_map": getattr(settings, "CHAT_PRIORITY_MAP", {}),
+    }
+
+
+user_context_store = UserContextStore()
@@ -0,0 +1,18 @@
+from typing import Any, Dict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from apps.shared.utils.logger import logger
+
+
+def chat_group_name(chat_id: int) -> str:
+    return f"chat_{chat_id}"
+
+
+def send_to_chat(chat_id: int, event: Dict[str, Any]) -> None:
+    """Broadcast ``event`` to the chat's WebSocket connections from sync code."""
+    try:
+        async_to_sync(get_channel_layer().group_send)(chat_group_name(chat_id), event)
+    except Exception as e:
+        logger.warning(f"Failed to send {event.get('type')} to chat {chat_id}: {e}")
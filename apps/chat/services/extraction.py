@@ -0,0 +1,132 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, List
+
+from django.conf import settings
+
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_async_redis, get_redis
+
+COALESCE_WINDOW = int(getattr(settings, "CHAT_EXTRACT_WINDOW_SECONDS", 10))
+DEDUPE_WINDOW = int(getattr(settings, "CHAT_EXTRACT_DEDUPE_SECONDS", 600))
+MAX_BATCH = int(getattr(settings, "CHAT_EXTRACT_MAX_MESSAGES", 10))
+
+STATS_KEY = "context_extract_stats"
+
+
+class ContextExtractionQueue:
+    """
+    Per-user Redis queue of messages waiting for user-context extraction.
+
+    The first message of a user schedules one Celery task ``COALESCE_WINDOW``
+    seconds later; everything that arrives in between is extracted by that same
+    task in a single LLM call. Identical messages of a user are dropped for
+    ``DEDUPE_WINDOW`` seconds.
+    """
+
+    @staticmethod
+    def _pending_key(user_id: int) -> str:
+        return f"context_extract_pending_{user_id}"
+
+    @staticmethod
+    def _scheduled_key(user_id: int) -> str:
+        return f"context_extract_scheduled_{user_id}"
+
+    @staticmethod
+    def _seen_key(user_id: int, text: str) -> str:
+        digest = hashlib.sha1(" ".join(text.lower().split()).encode()).hexdigest()
+        return f"context_extract_seen_{user_id}_{digest}"
+
+    async def enqueue(self, user_id: int, text: str) -> bool:
+        """
+        Queue ``text`` for extraction. Returns True if a new task has to be
+        scheduled for the user (see ``extract_user_context``).
+        """
+        if not text or not text.strip():
+            return False
+        redis = get_async_redis()
+        if not await redis.set(
+            self._seen_key(user_id, text), 1, nx=True, ex=DEDUPE_WINDOW
+        ):
+            logger.debug(f"Skipping duplicate context extraction for user {user_id}")
+            return False
+
+        pipe = redis.pipeline(transaction=False)
+        pipe.rpush(
+            self._pending_key(user_id),
+            json.dumps({"text": text, "ts": time.time()}, ensure_ascii=False),
+        )
+        pipe.expire(self._pending_key(user_id), DEDUPE_WINDOW)
+        pipe.set(self._scheduled_key(user_id), 1, nx=True, ex=COALESCE_WINDOW * 6)
+        _, _, scheduled = await pipe.execute()
+        return bool(scheduled)
+
+    def peek(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Read up to ``MAX_BATCH`` pending messages of a user (oldest first).
+
+        The messages stay queued until ``ack``, so a failed extraction is retried
+        with the same batch. Each item keeps its journal entry under ``raw``.
+        """
+        redis = get_redis()
+        raw = redis.lrange(self._pending_key(user_id), 0, MAX_BATCH - 1) or []
+        return [{**json.loads(item), "raw": item} for item in raw]
+
+    def ack(self, user_id: int, batch: List[Dict[str, Any]]) -> None:
+        """Remove an extracted ``batch`` and let new messages schedule a task."""
+        pipe = get_redis().pipeline(transaction=True)
+        for item in batch:
+            pipe.lrem(self._pending_key(user_id), 1, item["raw"])
+        # A message queued from now on schedules a new task (see ``reschedule``).
+        pipe.delete(self._scheduled_key(user_id))
+        pipe.execute()
+
+    def reschedule(self, user_id: int) -> bool:
+        """True if messages are still pending and no task is scheduled for them."""
+        redis = get_redis()
+        if not redis.llen(self._pending_key(user_id)):
+            return False
+        return bool(
+            redis.set(self._scheduled_key(user_id), 1, nx=True, ex=COALESCE_WINDOW * 6)
+        )
+
+    @staticmethod
+    def record_batch(size: int, lag: float) -> None:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, "batches", 1)
+        pipe.hincrby(STATS_KEY, "messages", size)
+        pipe.hincrby(STATS_KEY, "lag_ms_total", int(lag * 1000))
+        pipe.hset(
+            STATS_KEY, mapping={"last_batch_size": size, "last_lag_ms": int(lag * 1000)}
+        )
+        pipe.execute()
+
+    @staticmethod
+    async def record_prefilter(skipped: bool, local_facts: int) -> None:
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            pipe.hincrby(STATS_KEY, "prefilter_checked", 1)
+            pipe.hincrby(STATS_KEY, "prefilter_skipped", int(skipped))
+            pipe.hincrby(STATS_KEY, "prefilter_local_facts", local_facts)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Failed to record prefilter stats: {e}")
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        raw = get_redis().hgetall(STATS_KEY)
+        data = {key: int(value) for key, value in raw.items()}
+        batches = data.get("batches", 0)
+        data["avg_batch_size"] = (
+            round(data.get("messages", 0) / batches, 2) if batches else 0
+        )
+        data["avg_lag_ms"] = data.get("lag_ms_total", 0) // batches if batches else 0
+        checked = data.get("prefilter_checked", 0)
+        data["llm_calls_avoided"] = (
+            round(data.get("prefilter_skipped", 0) / checked, 3) if checked else 0
+        )
+        return data
+
+
+context_extraction_queue = ContextExtractionQueue()
@@ -4,7 +4,6 @@ import uuid
 from textwrap import wrap
 from typing import List
 
-from asgiref.sync import async_to_sync
 from django.core.files import File
 from docx import Document
 from docx.shared import Pt, Inches
@@ -15,7 +14,7 @@ from reportlab.pdfgen import canvas
 
 from apps.chat.enums.action import FileFormat
 from apps.chat.models.chat import ChatResource
-from apps.chat.services.ai import AIService
+from apps.chat.services.resource import store_resource
 from apps.users.models.users import User
 
 INLINE_PATTERN = re.compile(r"(\*\*.+?\*\*|\*.+?\*|`.+?`)", flags=re.DOTALL)
@@ -267,10 +266,7 @@ def save_chat_resource(user: User, filepath: str) -> ChatResource:
 
     filename = os.path.basename(filepath)
     with open(filepath, "rb") as f:
-        resource = ChatResource.objects.create(user=user, file=File(f, name=filename))
-        file_id = async_to_sync(AIService().create_file)(file=f)
-        resource.file_id = file_id
-        resource.save(update_fields=["file_id"])
+        resource, _ = store_resource(user, File(f, name=filename))
     return resource
 
 
@@ -0,0 +1,377 @@
+import asyncio
+import json
+import time
+import uuid
+import weakref
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.chat.models.chat import ChatResource, ChatRoom, Message
+from apps.chat.tasks.vector_store import add_files_to_vector_store
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_async_redis
+
+FLUSH_INTERVAL_MS = int(getattr(settings, "CHAT_PERSIST_FLUSH_MS", 200))
+FLUSH_MAX_ITEMS = int(getattr(settings, "CHAT_PERSIST_BATCH_SIZE", 100))
+MAX_ATTEMPTS = int(getattr(settings, "CHAT_PERSIST_MAX_ATTEMPTS", 3))
+
+JOURNAL_PREFIX = "chat_persist_journal_"
+ALIVE_PREFIX = "chat_persist_alive_"
+ALIVE_TTL = 30
+DEAD_LETTER_KEY = "chat_persist_dead_letter"
+
+
+@dataclass
+class PendingWrite:
+    """
+    A finished AI turn waiting to be written.
+
+    A write with ``text`` creates an AI message; a write with ``title`` renames the
+    chat. ``uid`` makes every journal entry unique so it can be removed exactly.
+    """
+
+    chat_id: int
+    text: str = ""
+    openai_response_id: Optional[str] = None
+    truncated: bool = False
+    file_ids: List[int] = field(default_factory=list)
+    usage: Optional[Dict[str, Any]] = None
+    title: Optional[str] = None
+    uid: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, raw: str) -> "PendingWrite":
+        return cls(**json.loads(raw))
+
+
+class MessagePersister:
+    """
+    Write-behind persistence for AI messages and chat titles.
+
+    Writes are buffered in memory and flushed every ``CHAT_PERSIST_FLUSH_MS`` or
+    as soon as ``CHAT_PERSIST_BATCH_SIZE`` are waiting, with one ``bulk_create``
+    for the messages, one bulk insert for their attachments and one ``UPDATE``
+    per chat for counters and titles, all in a single transaction.
+
+    Every write is also appended to a Redis list (the journal) and removed only
+    after its batch is committed. Journals of dead processes are picked up on
+    start, so a write is persisted at least once; messages whose
+    ``openai_response_id`` is already stored are skipped on replay.
+
+    If a batch fails, its writes are retried one by one so a single bad write
+    cannot hold up the rest. A write that fails ``CHAT_PERSIST_MAX_ATTEMPTS``
+    times on its own is moved to the ``chat_persist_dead_letter`` Redis list.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.journal_key = f"{JOURNAL_PREFIX}{self.id}"
+        self.alive_key = f"{ALIVE_PREFIX}{self.id}"
+        self._buffer: List[PendingWrite] = []
+        self._pending_chats: Counter = Counter()
+        self._attempts: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, chat: ChatRoom, write: PendingWrite) -> None:
+        """Queue ``write`` and apply it to the in-memory ``chat`` right away."""
+        self.start()
+        self._buffer.append(write)
+        self._pending_chats[write.chat_id] += 1
+        if write.text:
+            chat.ai_message_count += 1
+            chat.last_message_at = timezone.now()
+        if write.title:
+            chat.name = write.title
+        if len(self._buffer) >= FLUSH_MAX_ITEMS:
+            self._wakeup.set()
+
+        try:
+            await get_async_redis().rpush(self.journal_key, write.dumps())
+        except Exception as e:
+            logger.warning(
+                f"Failed to journal pending write for chat {write.chat_id}: {e}"
+            )
+
+    def has_pending(self, chat_id: int) -> bool:
+        return self._pending_chats[chat_id] > 0
+
+    async def drain(self, chat_id: int) -> None:
+        """
+        Flush now if ``chat_id`` has writes waiting.
+
+        ``created_at`` is set on insert, so pending answers must be stored before
+        the next user message of the same chat to keep the history in order.
+        """
+        if self.has_pending(chat_id):
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            try:
+                await database_sync_to_async(self._write)(batch)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to flush {len(batch)} pending writes, "
+                    f"retrying them one by one: {e}"
+                )
+                batch = await self._write_each(batch)
+
+            for write in batch:
+                self._pending_chats[write.chat_id] -= 1
+                if self._pending_chats[write.chat_id] <= 0:
+                    del self._pending_chats[write.chat_id]
+            await self._forget(batch)
+
+    async def _write_each(self, batch: List[PendingWrite]) -> List[PendingWrite]:
+        """
+        Write ``batch`` one write at a time and return the writes that are settled.
+
+        Failed writes go back to the front of the buffer (with their journal
+        entries) until they have failed ``MAX_ATTEMPTS`` times; then they are
+        dead-lettered and settled as well.
+        """
+        settled: List[PendingWrite] = []
+        retry: List[PendingWrite] = []
+        dead: List[PendingWrite] = []
+        for write in batch:
+            try:
+                await database_sync_to_async(self._write)([write])
+            except Exception as e:
+                attempts = self._attempts.get(write.uid, 0) + 1
+                if attempts < MAX_ATTEMPTS:
+                    self._attempts[write.uid] = attempts
+                    retry.append(write)
+                    continue
+                logger.error(
+                    f"Dead-lettering pending write {write.uid} for chat "
+                    f"{write.chat_id} after {attempts} failed attempts: {e}"
+                )
+                dead.append(write)
+            settled.append(write)
+            self._attempts.pop(write.uid, None)
+
+        self._buffer[:0] = retry
+        if dead:
+            await self._dead_letter(dead)
+        return settled
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        if self._buffer:
+            logger.warning(
+                f"{len(self._buffer)} pending writes left in {self.journal_key}"
+            )
+        try:
+            # Let another process adopt whatever is left without waiting for the TTL.
+            await get_async_redis().delete(self.alive_key)
+        except Exception as e:
+            logger.debug(f"Failed to release {self.alive_key}: {e}")
+
+    async def _run(self) -> None:
+        await self._recover()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=FLUSH_INTERVAL_MS / 1000
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                await self._heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Message persister loop error: {e}")
+
+    # ---------------------- journal ----------------------
+    async def _heartbeat(self) -> None:
+        now = time.monotonic()
+        if now - self._heartbeat_at < ALIVE_TTL / 3:
+            return
+        self._heartbeat_at = now
+        await get_async_redis().set(self.alive_key, 1, ex=ALIVE_TTL)
+
+    async def _forget(self, batch: List[PendingWrite]) -> None:
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            for write in batch:
+                pipe.lrem(self.journal_key, 1, write.dumps())
+            await pipe.execute()
+        except Exception as e:
+            # Harmless: replayed messages are skipped by openai_response_id.
+            logger.warning(f"Failed to trim {self.journal_key}: {e}")
+
+    async def _dead_letter(self, writes: List[PendingWrite]) -> None:
+        try:
+            pipe = get_async_redis().pipeline(transaction=True)
+            for write in writes:
+                pipe.rpush(DEAD_LETTER_KEY, write.dumps())
+            await pipe.execute()
+        except Exception as e:
+            logger.error(
+                f"Failed to dead-letter {len(writes)} pending writes: {e}; "
+                f"dropping {[write.dumps() for write in writes]}"
+            )
+
+    async def _recover(self) -> None:
+        """Adopt the journals of processes that stopped without flushing."""
+        try:
+            redis = get_async_redis()
+            await self._heartbeat()
+            async for key in redis.scan_iter(match=f"{JOURNAL_PREFIX}*"):
+                if key == self.journal_key:
+                    continue
+                owner = key[len(JOURNAL_PREFIX) :]
+                if await redis.exists(f"{ALIVE_PREFIX}{owner}"):
+                    continue
+                adopted = 0
+                # LMOVE is atomic, so two processes never adopt the same entry.
+                while raw := await redis.lmove(key, self.journal_key, "LEFT", "RIGHT"):
+                    write = PendingWrite.loads(raw)
+                    self._buffer.append(write)
+                    self._pending_chats[write.chat_id] += 1
+                    adopted += 1
+                if adopted:
+                    logger.info(f"Recovered {adopted} pending writes from {key}")
+        except Exception as e:
+            logger.warning(f"Failed to recover pending writes: {e}")
+
+    # ---------------------- database ----------------------
+    @staticmethod
+    def _write(batch: List[PendingWrite]) -> None:
+        chat_ids = {write.chat_id for write in batch}
+        existing = set(
+            ChatRoom.objects.filter(id__in=chat_ids).values_list("id", flat=True)
+        )
+        response_ids = [w.openai_response_id for w in batch if w.openai_response_id]
+        stored = set(
+            Message.objects.filter(openai_response_id__in=response_ids).values_list(
+                "openai_response_id", flat=True
+            )
+            if response_ids
+            else []
+        )
+        resource_ids = {fid for w in batch for fid in w.file_ids}
+        resources = set(
+            ChatResource.objects.filter(id__in=resource_ids).values_list(
+                "id", flat=True
+            )
+            if resource_ids
+            else []
+        )
+
+        messages: List[Message] = []
+        message_files: List[List[int]] = []
+        titles: Dict[int, str] = {}
+        for write in batch:
+            if write.chat_id not in existing:
+                logger.warning(
+                    f"Dropping pending write for deleted chat {write.chat_id}"
+                )
+                continue
+            if write.title:
+                titles[write.chat_id] = write.title
+            if not write.text or write.openai_response_id in stored:
+                continue
+            if write.openai_response_id:
+                stored.add(write.openai_response_id)
+            messages.append(
+                Message(
+                    chat_id=write.chat_id,
+                    sender=None,
+                    message=write.text,
+                    openai_response_id=write.openai_response_id,
+                    truncated=write.truncated,
+                    usage=write.usage,
+                )
+            )
+            message_files.append([fid for fid in write.file_ids if fid in resources])
+
+        vector_files: Dict[int, List[int]] = defaultdict(list)
+        with transaction.atomic():
+            created = Message.objects.bulk_create(messages)
+
+            through = Message.file.through
+            through.objects.bulk_create(
+                [
+                    through(message_id=message.id, chatresource_id=resource_id)
+                    for message, file_ids in zip(created, message_files)
+                    for resource_id in file_ids
+                ]
+            )
+
+            counts: Counter = Counter()
+            last_at = {}
+            for message, file_ids in zip(created, message_files):
+                counts[message.chat_id] += 1
+                last_at[message.chat_id] = max(
+                    message.created_at, last_at.get(message.chat_id, message.created_at)
+                )
+                vector_files[message.chat_id].extend(file_ids)
+
+            for chat_id in counts.keys() | titles.keys():
+                changes = {}
+                if counts[chat_id]:
+                    changes["ai_message_count"] = (
+                        F("ai_message_count") + counts[chat_id]
+                    )
+                    changes["last_message_at"] = last_at[chat_id]
+                if chat_id in titles:
+                    changes["name"] = titles[chat_id]
+                ChatRoom.objects.filter(id=chat_id).update(**changes)
+
+            for chat_id, file_ids in vector_files.items():
+                if file_ids:
+                    transaction.on_commit(
+                        lambda c=chat_id, f=file_ids: add_files_to_vector_store.delay(
+                            c, f
+                        )
+                    )
+
+
+# One persister per event loop, like the OpenAI client.
+_persisters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MessagePersister]" = weakref.WeakKeyDictionary()
+
+
+def get_message_persister() -> MessagePersister:
+    loop = asyncio.get_running_loop()
+    persister = _persisters.get(loop)
+    if persister is None:
+        persister = MessagePersister()
+        _persisters[loop] = persister
+    return persister
+
+
+async def close_message_persister() -> None:
+    """Flush and stop the persister of the running event loop."""
+    persister = _persisters.pop(asyncio.get_running_loop(), None)
+    if persister is not None:
+        await persister.close()
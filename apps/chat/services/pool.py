@@ -0,0 +1,81 @@
+import uuid
+from typing import List, Optional
+
+from django.conf import settings
+
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_async_redis, get_redis
+
+TARGET_SIZE = int(getattr(settings, "CHAT_CONVERSATION_POOL_SIZE", 50))
+LOW_WATER = int(getattr(settings, "CHAT_CONVERSATION_POOL_LOW_WATER", 10))
+REFILL_DEBOUNCE = 60
+
+POOL_KEY = "openai_conversation_pool"
+REFILL_KEY = "openai_conversation_pool_refill"
+LOCK_KEY = "openai_conversation_pool_lock"
+
+# Deletes the lock only while it still holds our token: a worker whose lock
+# expired must not release the lock another worker has taken since.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1], KEYS[2])
+end
+return 0
+"""
+
+
+class ConversationPool:
+    """
+    Redis list of pre-created OpenAI conversation ids.
+
+    Creating a chat pops one id instead of waiting for the OpenAI round trip.
+    ``replenish_conversation_pool`` tops the list up to ``TARGET_SIZE`` on Celery
+    beat and whenever a claim leaves fewer than ``LOW_WATER`` ids.
+    """
+
+    async def claim(self) -> Optional[str]:
+        """Pop a conversation id; None if the pool is empty or unreachable."""
+        try:
+            return await get_async_redis().lpop(POOL_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to claim a pooled conversation: {e}")
+            return None
+
+    def size(self) -> int:
+        return int(get_redis().llen(POOL_KEY))
+
+    def missing(self) -> int:
+        return max(0, TARGET_SIZE - self.size())
+
+    def add(self, conversation_ids: List[str]) -> None:
+        if conversation_ids:
+            get_redis().rpush(POOL_KEY, *conversation_ids)
+
+    async def needs_refill(self) -> bool:
+        """
+        True if the pool is below ``LOW_WATER`` and no refill was requested in
+        the last ``REFILL_DEBOUNCE`` seconds.
+        """
+        try:
+            redis = get_async_redis()
+            if await redis.llen(POOL_KEY) >= LOW_WATER:
+                return False
+            return bool(await redis.set(REFILL_KEY, 1, nx=True, ex=REFILL_DEBOUNCE))
+        except Exception as e:
+            logger.warning(f"Failed to check the conversation pool: {e}")
+            return False
+
+    def acquire_lock(self, timeout: int) -> Optional[str]:
+        """Take the refill lock; returns the token for ``release_lock`` or None."""
+        token = uuid.uuid4().hex
+        if get_redis().set(LOCK_KEY, token, nx=True, ex=timeout):
+            return token
+        return None
+
+    def release_lock(self, token: str) -> None:
+        """Release the lock (and the refill debounce) if ``token`` still holds it."""
+        if not get_redis().eval(_RELEASE_SCRIPT, 2, LOCK_KEY, REFILL_KEY, token):
+            logger.warning("Conversation pool lock expired before the refill ended")
+
+
+conversation_pool = ConversationPool()
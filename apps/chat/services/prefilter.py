@@ -0,0 +1,190 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Pattern, Set
+
+# Uzbek is written with several apostrophe variants (o‘, oʻ, o’, o`).
+_APOSTROPHES = str.maketrans({"‘": "'", "’": "'", "ʻ": "'", "ʼ": "'", "`": "'"})
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?<![\w+])\+?\d[\d\s()-]{7,16}\d(?!\w)")
+# Contact details are only taken locally when their sentence talks about the user
+# and not about someone the user mentions ("call ... for my dentist").
+OWNERSHIP = re.compile(
+    r"\b(?:my|mine|i|i'm|мой|моя|мои|мне|меня|я|mening|menga|менинг|менга)\b"
+    r"|raqamim|pochtam|emailim|рақамим|почтам",
+    re.IGNORECASE,
+)
+THIRD_PARTY = re.compile(
+    r"\b(?:for|of|to|from|with) my\b|\bmy \w+'s\b"
+    r"|\b(?:для|у|от) (?:моего|моей|моих)\b|\bмоего\b|\bмоей\b"
+    r"|\w+mning\b|\w+мнинг\b",
+    re.IGNORECASE,
+)
+
+_NAME_WORD = r"((?-i:[A-ZА-ЯЁЎҚҒҲ])[\w'-]{1,30})"
+# Only at the start of the message or of a sentence/clause, so "he said my name
+# is ..." or a quoted line is not taken as the user's own name.
+NAME = re.compile(
+    r"(?:^|[.!;,\n])\s*(?:my name is|меня зовут|моё имя|мое имя|mening ismim|ismim"
+    r"|менинг исмим|исмим)\s+" + _NAME_WORD,
+    re.IGNORECASE,
+)
+# A fact inside a question or a quotation is left to the LLM. A period only ends
+# a sentence before whitespace, so e-mail addresses stay in one piece.
+SENTENCE_END = re.compile(r"[.!?](?=\s|$)|\n")
+QUOTES = re.compile(r"[\"“”„«»]")
+AGE = re.compile(
+    r"\b(?:i am|i'm)\s+(\d{1,2})\s+years?\s+old\b"
+    r"|\bмне\s+(\d{1,2})\s+(?:год|года|лет)\b"
+    r"|\b(\d{1,2})\s+(?:yoshdaman|ёшдаман)"
+    r"|\b(?:yoshim|ёшим)\s+(\d{1,2})\b",
+    re.IGNORECASE,
+)
+
+# Phrases that announce a personal fact the LLM should structure, per category of
+# CHAT_PERSISTENT_KEYS. English, Russian, Uzbek (Latin and Cyrillic).
+LEXICONS: Dict[str, Pattern] = {
+    "name": re.compile(
+        r"\bmy name\b|\bcall me (?-i:[A-ZА-ЯЁ])|\bзовут\b|\bимя\b"
+        r"|\bismim\b|\bismi\b|\bисмим\b",
+        re.IGNORECASE,
+    ),
+    "age": re.compile(
+        r"\byears? old\b|\bмне \d+\b|\byosh(?:daman|im)\b|\bёш(?:даман|им)\b",
+        re.IGNORECASE,
+    ),
+    "birthday": re.compile(
+        r"\bmy birthday\b|\bi was born\b|\bдень рождения\b|\bя родил"
+        r"|\btug'ilgan\b|\btug'ilganman\b|\bтуғилган",
+        re.IGNORECASE,
+    ),
+    "location": re.compile(
+        r"\bi live in\b|\bi'm from\b|\bi am from\b|\bi'm based in\b"
+        r"|\bя живу\b|\bживу в\b|\bя из\b|\byashayman\b|\w(?:dan|ден|дан)man\b"
+        r"|\bяшайман\b|\wданман\b",
+        re.IGNORECASE,
+    ),
+    "work": re.compile(
+        r"\bi work\b|\bi'm an? \w+ (?:at|in)\b|\bmy job\b|\bmy company\b"
+        r"|\bработаю\b|\bмоя работа\b|\bмоя компания\b|\bпо профессии\b"
+        r"|\bishlayman\b|\bkasbim\b|\bkompaniyam\b|\bишлайман\b|\bкасбим\b",
+        re.IGNORECASE,
+    ),
+    "language": re.compile(
+        r"\bi speak\b|\bmy native language\b|\bговорю на\b|\bмой родной\b"
+        r"|\bgapiraman\b|\bona tilim\b|\bгапираман\b",
+        re.IGNORECASE,
+    ),
+    "preferences": re.compile(
+        r"\bi (?:really )?(?:like|love|hate|enjoy|prefer|dislike)\b|\bmy hobby\b"
+        r"|\bmy hobbies\b|\bmy favou?rite\b|\bя (?:очень )?(?:люблю|обожаю|ненавижу)\b"
+        r"|\bмоё хобби\b|\bмое хобби\b|\bмой любимый\b|\bмоя любимая\b"
+        r"|\byaxshi ko'raman\b|\bsevaman\b|\byoqtirmayman\b|\bxobbim\b|\bsevimli\b"
+        r"|\bяхши кўраман\b|\bсеваман\b|\bхоббим\b",
+        re.IGNORECASE,
+    ),
+    "skills": re.compile(
+        r"\bi know how to\b|\bi can (?:code|program|speak)\b|\bmy skills\b"
+        r"|\bя умею\b|\bвладею\b|\bbilaman\b|\bбиламан\b",
+        re.IGNORECASE,
+    ),
+    "goal": re.compile(
+        r"\bmy goal\b|\bi want to become\b|\bi'm planning to\b|\bi plan to\b"
+        r"|\bi'm preparing for\b|\bмоя цель\b|\bхочу стать\b|\bготовлюсь к\b"
+        r"|\bmaqsadim\b|\bbo'lmoqchiman\b|\btayyorlanyapman\b|\bмақсадим\b",
+        re.IGNORECASE,
+    ),
+    "social": re.compile(r"(?<![\w@])@[A-Za-z_][\w.]{2,}"),
+}
+
+
+@dataclass
+class PrefilterResult:
+    should_extract: bool
+    facts: Dict[str, object] = field(default_factory=dict)
+    categories: Set[str] = field(default_factory=set)
+    # Facts the user stated about themselves outright ("My name is ..."); they may
+    # replace what the LLM extracted earlier.
+    statements: Set[str] = field(default_factory=set)
+
+
+class FactPrefilter:
+    """
+    Cheap local check run before LLM-based user-context extraction.
+
+    Structured facts (email, phone, name, age) are extracted with regular
+    expressions, but only from declarative sentences about the user. Other lexicon
+    categories only mark the message as worth an LLM call, as do facts found in
+    questions, quotations or sentences about someone else. A message matching
+    nothing is skipped.
+    """
+
+    def extract_facts(self, text: str) -> Dict[str, object]:
+        facts: Dict[str, object] = {}
+        if match := EMAIL.search(text):
+            if self._owned(self._sentence(text, match.start(), match.end())):
+                facts["email"] = match.group(0).lower()
+        if match := PHONE.search(text):
+            digits = re.sub(r"[^\d+]", "", match.group(0))
+            if 9 <= len(digits.lstrip("+")) <= 15 and self._owned(
+                self._sentence(text, match.start(), match.end())
+            ):
+                facts["phone"] = digits
+        if name := self._own_name(text):
+            facts["name"] = name
+        if match := AGE.search(text):
+            if self._declarative(self._sentence(text, match.start(), match.end())):
+                facts["age"] = int(next(g for g in match.groups() if g))
+        return facts
+
+    @staticmethod
+    def _sentence(text: str, start: int, end: int) -> str:
+        """The sentence of ``text`` containing ``text[start:end]``."""
+        begin = max(
+            (found.end() for found in SENTENCE_END.finditer(text, 0, start)),
+            default=0,
+        )
+        stop = SENTENCE_END.search(text, end)
+        return text[begin : stop.end() if stop else len(text)]
+
+    @staticmethod
+    def _declarative(sentence: str) -> bool:
+        return "?" not in sentence and not QUOTES.search(sentence)
+
+    def _owned(self, sentence: str) -> bool:
+        return (
+            self._declarative(sentence)
+            and bool(OWNERSHIP.search(sentence))
+            and not THIRD_PARTY.search(sentence)
+        )
+
+    def _own_name(self, text: str) -> Optional[str]:
+        match = NAME.search(text)
+        if match is None:
+            return None
+        if not self._declarative(self._sentence(text, match.start(1), match.end())):
+            return None
+        return match.group(1)
+
+    def classify(self, text: Optional[str]) -> PrefilterResult:
+        if not text or not text.strip():
+            return PrefilterResult(should_extract=False)
+        text = text.translate(_APOSTROPHES)
+
+        facts = self.extract_facts(text)
+        categories = {name for name, regex in LEXICONS.items() if regex.search(text)}
+        # Contact details that may belong to someone else are left to the LLM.
+        for key, regex in (("email", EMAIL), ("phone", PHONE)):
+            if key not in facts and regex.search(text):
+                categories.add(key)
+        # Categories fully covered by the regex facts need no LLM call.
+        statements = {key for key in facts if key in ("name", "age")}
+        return PrefilterResult(
+            should_extract=bool(categories - statements),
+            facts=facts,
+            categories=categories | set(facts),
+            statements=statements,
+        )
+
+
+fact_prefilter = FactPrefilter()
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.shared.utils.logger import logger
+
+PRESENCE_TTL = int(getattr(settings, "CHAT_PRESENCE_TTL", 6 * 60 * 60))
+
+
+class ChatPresence:
+    """
+    Number of open WebSocket connections per chat room, kept in the shared cache
+    so every worker process sees the same value.
+    """
+
+    @staticmethod
+    def _key(room_id) -> str:
+        return f"chat_presence_{room_id}"
+
+    @classmethod
+    async def join(cls, room_id) -> int:
+        key = cls._key(room_id)
+        try:
+            await cache.aadd(key, 0, PRESENCE_TTL)
+            count = await cache.aincr(key)
+            await cache.atouch(key, PRESENCE_TTL)
+            return count
+        except Exception as e:
+            logger.warning(f"Failed to register presence for chat {room_id}: {e}")
+            return 0
+
+    @classmethod
+    async def leave(cls, room_id) -> None:
+        key = cls._key(room_id)
+        try:
+            if await cache.adecr(key) <= 0:
+                await cache.adelete(key)
+        except ValueError:
+            # Key already expired; nothing to release.
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to release presence for chat {room_id}: {e}")
+
+    @classmethod
+    async def count(cls, room_id) -> int:
+        try:
+            return int(await cache.aget(cls._key(room_id), 0) or 0)
+        except Exception as e:
+            logger.warning(f"Failed to read presence for chat {room_id}: {e}")
+            # Unknown presence: assume there may be other tabs listening.
+            return 2
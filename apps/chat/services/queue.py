@@ -0,0 +1,111 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+from apps.shared.utils.logger import logger
+from apps.shared.utils.timing import StageTimer
+
+
+@dataclass
+class ChatJob:
+    id: int
+    message_text: str
+    file_ids: Optional[List[int]] = None
+    action_type: Optional[str] = None
+    file_format: Optional[str] = None
+    timer: StageTimer = field(default_factory=StageTimer)
+
+
+class ChatJobQueue:
+    """
+    Bounded FIFO of prompts for a single WebSocket connection.
+
+    Jobs are executed one at a time, in order, by a background worker so the
+    consumer's receive loop never waits for an AI generation to finish.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[ChatJob], Awaitable[None]],
+        maxsize: int = 5,
+        on_positions: Optional[
+            Callable[[List[Tuple[int, int]]], Awaitable[None]]
+        ] = None,
+    ):
+        self._handler = handler
+        self._on_positions = on_positions
+        self.maxsize = max(0, int(maxsize))
+
+        self._pending: Deque[ChatJob] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._last_id = 0
+        self.current: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None and not self.current.done()
+
+    def submit(self, job: ChatJob) -> Optional[int]:
+        """
+        Queue a job. Returns the number of jobs ahead of it (0 means it starts
+        right away) or ``None`` when the queue is full.
+        """
+        if len(self._pending) >= self.maxsize:
+            return None
+        self._pending.append(job)
+        self._wakeup.set()
+        return len(self._pending) - (0 if self.busy else 1)
+
+    def cancel_current(self) -> Optional[asyncio.Task]:
+        task = self.current
+        if task and not task.done():
+            task.cancel()
+            return task
+        return None
+
+    async def close(self) -> None:
+        """Drop queued jobs, cancel the running one and stop the worker."""
+        self._pending.clear()
+        task = self.cancel_current()
+        if task:
+            await asyncio.wait([task])
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.wait([self._worker])
+            self._worker = None
+
+    def positions(self) -> List[Tuple[int, int]]:
+        offset = 1 if self.busy else 0
+        return [(job.id, index + offset) for index, job in enumerate(self._pending)]
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job = self._pending.popleft()
+            job.timer.mark("dequeued")
+            self.current = asyncio.create_task(self._handler(job))
+
+            if self._pending and self._on_positions:
+                try:
+                    await self._on_positions(self.positions())
+                except Exception as e:
+                    logger.debug(f"Failed to send queue positions: {e}")
+
+            await asyncio.wait([self.current])
+            if not self.current.cancelled() and self.current.exception():
+                logger.error(f"Chat job {job.id} failed: {self.current.exception()}")
+            self.current = None
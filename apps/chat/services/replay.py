@@ -0,0 +1,78 @@
+import json
+import uuid
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_async_redis
+
+REPLAY_TTL = int(getattr(settings, "CHAT_STREAM_REPLAY_TTL", 300))
+REPLAY_MAX_FRAMES = int(getattr(settings, "CHAT_STREAM_REPLAY_MAX_FRAMES", 5000))
+
+
+# Allocates the next room-wide sequence number and appends the frame under it
+# in one step, so concurrent answers in the same room never reuse or reorder ids.
+_RECORD_SCRIPT = """
+local seq = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '0-' .. seq, 'event', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return seq
+"""
+
+
+class StreamReplay:
+    """
+    Short-lived Redis Stream with the frames of the answers being generated in a room.
+
+    Every frame gets a sequence number (``seq``) and the id of the answer it belongs
+    to (``stream_id``). A client that lost its connection can ask for every frame
+    after the last ``seq`` it saw instead of reloading the message history.
+
+    Sequence numbers are allocated per room with a shared counter, so several
+    connections (e.g. two tabs) can stream into the same room without clobbering
+    each other. Entries use ``0-<seq>`` ids so a replay is a single exclusive
+    ``XRANGE``; old frames fall off through ``MAXLEN`` and the TTL.
+    """
+
+    def __init__(self, room_id, stream_id: Optional[str] = None):
+        self.key = _stream_key(room_id)
+        self.seq_key = f"chat_stream_seq_{room_id}"
+        self.stream_id = stream_id or uuid.uuid4().hex[:12]
+
+    async def record(self, event: Dict) -> Dict:
+        """Number an outgoing event and append it to the replay stream."""
+        event = {**event, "stream_id": self.stream_id}
+        try:
+            seq = await get_async_redis().eval(
+                _RECORD_SCRIPT,
+                2,
+                self.key,
+                self.seq_key,
+                json.dumps(event, ensure_ascii=False),
+                REPLAY_MAX_FRAMES,
+                REPLAY_TTL,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to append frame to {self.key}: {e}")
+            return event
+        return {**event, "seq": int(seq)}
+
+    @staticmethod
+    async def read_from(room_id, seq: int) -> List[Dict]:
+        """Return the frames in the room with a sequence number above ``seq``."""
+        key = _stream_key(room_id)
+        try:
+            entries = await get_async_redis().xrange(key, min=f"(0-{max(0, seq)}")
+        except Exception as e:
+            logger.warning(f"Failed to read replay stream {key}: {e}")
+            return []
+        return [
+            {**json.loads(fields["event"]), "seq": int(entry_id.split("-", 1)[1])}
+            for entry_id, fields in entries
+        ]
+
+
+def _stream_key(room_id) -> str:
+    return f"chat_stream_{room_id}"
@@ -0,0 +1,74 @@
+from typing import Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from apps.chat.enums.file import FileStatus
+from apps.chat.models.chat import ChatResource
+from apps.chat.tasks.resource import upload_chat_resource
+from apps.shared.utils.logger import logger
+from apps.shared.utils.upload import file_sha256
+from apps.users.models.users import User
+
+
+def _reuse(user: User, sha256: str, upload: bool) -> Optional[ChatResource]:
+    """The user's resource with this content, counted as reused; None if new."""
+    resource = ChatResource.objects.filter(user=user, sha256=sha256).first()
+    if resource is None:
+        return None
+
+    changes = {"reuse_count": F("reuse_count") + 1}
+    retry_upload = False
+    if resource.status == FileStatus.FAILED:
+        # A duplicate of a failed file is a retry.
+        retry_upload = not resource.file_id
+        resource.status = FileStatus.PENDING if retry_upload else FileStatus.UPLOADED
+        changes["status"] = resource.status
+    ChatResource.objects.filter(id=resource.id).update(**changes)
+    resource.reuse_count += 1
+
+    if retry_upload and upload:
+        upload_chat_resource.delay(resource.id)
+    logger.info(f"Reusing chat resource {resource.id} for an identical file")
+    return resource
+
+
+def store_resource(
+    user: User, file, sha256: Optional[str] = None, upload: bool = True
+) -> Tuple[ChatResource, bool]:
+    """
+    Store an uploaded or generated file for ``user`` and queue its OpenAI upload.
+
+    A file whose content the user stored before is not written, uploaded or
+    indexed again; the existing resource (with its storage object and
+    ``file_id``) is returned instead. Returns ``(resource, created)``.
+
+    With ``upload=False`` the caller queues the upload of resources left
+    ``pending``, e.g. one ``upload_chat_resources`` task for a whole batch.
+    """
+    sha256 = sha256 or file_sha256(file)
+    resource = _reuse(user, sha256, upload)
+    if resource is not None:
+        return resource, False
+
+    resource = ChatResource(user=user, file=file, sha256=sha256)
+    try:
+        with transaction.atomic():
+            resource.save()
+    except IntegrityError:
+        # The same file was stored concurrently; drop our copy.
+        resource.file.delete(save=False)
+        resource = _reuse(user, sha256, upload)
+        if resource is None:
+            raise
+        return resource, False
+
+    if not upload:
+        return resource, True
+    try:
+        upload_chat_resource.delay(resource.id)
+    except Exception:
+        resource.file.delete(save=False)
+        resource.delete()
+        raise
+    return resource, True
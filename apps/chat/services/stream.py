@@ -0,0 +1,84 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from apps.shared.utils.logger import logger
+
+
+class ChunkCoalescer:
+    """
+    Buffer AI text deltas and send them as larger WebSocket frames.
+
+    A frame is flushed when the buffer reaches ``chunk_size`` characters or when
+    the oldest buffered delta has been waiting for ``max_latency`` seconds.
+    Frames are always sent in the order the deltas were added.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        chunk_size: int = 512,
+        max_latency: float = 0.03,
+    ):
+        self._send = send
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_latency = max(0.0, float(max_latency))
+
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        self.deltas = 0
+        self.frames = 0
+        self.bytes = 0
+
+    async def add(self, delta: str) -> None:
+        if not delta:
+            return
+
+        self.deltas += 1
+        self._buffer.append(delta)
+        self._buffered += len(delta)
+
+        if self._buffered >= self.chunk_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_latency)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Delayed flush of AI chunks failed: {e}")
+
+    async def flush(self) -> None:
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+        async with self._lock:
+            if not self._buffer:
+                return
+            chunk = "".join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+
+            self.frames += 1
+            self.bytes += len(chunk.encode("utf-8"))
+            await self._send(chunk)
+
+    async def close(self) -> None:
+        """Flush whatever is left in the buffer. Call before sending AI_END."""
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Failed to flush buffered AI chunks: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "deltas": self.deltas,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "bytes_per_frame": round(self.bytes / self.frames, 1) if self.frames else 0,
+        }
@@ -0,0 +1,101 @@
+import re
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.shared.utils.logger import logger
+
+DEFAULT_TITLES = {"", "new chat", "untitled"}
+MAX_WORDS = 6
+MAX_LENGTH = 60
+TITLED_TTL = int(getattr(settings, "CHAT_TITLE_CLAIM_TTL", 24 * 60 * 60))
+
+HEADING = re.compile(r"^\s{0,3}#{1,3}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+MARKDOWN = re.compile(r"[*_`~\[\]<>]|\(https?://[^)]*\)")
+WORD = re.compile(r"[\w'’ʻ-]+", re.UNICODE)
+
+# Filler words dropped when a title is built from the user's message.
+STOPWORDS = {
+    *(
+        "a an the and or but of to in on for with about is are was be it this that "
+        "these those me my i you your we can could would should please pls explain "
+        "tell give write show help how what why do does make some simple briefly "
+        "hi hello what's"
+    ).split(),
+    *(
+        "и в во на с со о об по для что как это мне я ты вы пожалуйста объясни "
+        "объясните расскажи напиши напишите помоги дай можно ли про привет такое"
+    ).split(),
+    *(
+        "va bilan uchun haqida menga men siz iltimos nima qanday tushuntiring "
+        "tushuntir yozing yozib bering ber ayting yordam salom bu ham mumkin qilib"
+    ).split(),
+}
+
+
+def _clean(text: str) -> str:
+    text = MARKDOWN.sub("", text)
+    text = re.sub(r"\s+", " ", text).strip(" .,:;!?-—")
+    return text
+
+
+def _shorten(text: str) -> str:
+    words = text.split()[:MAX_WORDS]
+    title = " ".join(words)
+    if len(title) > MAX_LENGTH:
+        title = title[:MAX_LENGTH].rsplit(" ", 1)[0]
+    return title
+
+
+def title_from_answer(answer: str) -> Optional[str]:
+    """The first Markdown heading of the answer, if it has one."""
+    match = HEADING.search(answer or "")
+    if not match:
+        return None
+    title = _shorten(_clean(match.group(1)))
+    return title or None
+
+
+def title_from_message(message: str) -> Optional[str]:
+    """Key words of the user's message, in their original order."""
+    words = [
+        word
+        for word in WORD.findall(_clean(message or ""))
+        if word.lower() not in STOPWORDS and not word.isdigit()
+    ]
+    if not words:
+        return None
+    title = _shorten(" ".join(words))
+    return title[:1].upper() + title[1:] if title else None
+
+
+def generate_local_title(answer: str, user_message: str = "") -> Optional[str]:
+    """Chat title without an LLM call: answer heading, then message key words."""
+    return title_from_answer(answer) or title_from_message(user_message)
+
+
+def needs_title(name: Optional[str]) -> bool:
+    return (name or "").strip().lower() in DEFAULT_TITLES
+
+
+async def claim_title(chat_id: int) -> bool:
+    """
+    Reserve the right to title ``chat_id``; False if it was titled already.
+
+    Written-behind titles can reach the database after a new connection has
+    loaded the chat, so the chat's name alone is not a reliable check.
+    """
+    try:
+        return await cache.aadd(f"chat_titled_{chat_id}", 1, TITLED_TTL)
+    except Exception as e:
+        logger.warning(f"Failed to claim title for chat {chat_id}: {e}")
+        return True
+
+
+async def release_title(chat_id: int) -> None:
+    """Give up a claim from ``claim_title`` when no title was produced."""
+    try:
+        await cache.adelete(f"chat_titled_{chat_id}")
+    except Exception as e:
+        logger.warning(f"Failed to release title claim for chat {chat_id}: {e}")
@@ -0,0 +1,9 @@
+import importlib
+import os
+
+current_dir = os.path.dirname(__file__)
+
+for filename in os.listdir(current_dir):
+    if filename.endswith(".py") and filename != "__init__.py":
+        module_name = f"{__name__}.{filename[:-3]}"
+        importlib.import_module(module_name)
@@ -0,0 +1,92 @@
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from apps.chat.models.chat import UserFact
+from apps.chat.services.ai import AIService
+from apps.chat.services.client import close_openai_client
+from apps.chat.services.context import UserContextStore, context_update_options
+from apps.chat.services.extraction import context_extraction_queue
+from apps.shared.utils.logger import logger
+from apps.shared.utils.redis import get_redis
+
+PURGE_BATCH_SIZE = int(getattr(settings, "CHAT_FACT_PURGE_BATCH_SIZE", 5000))
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def purge_expired_user_facts(self) -> int:
+    """
+    Delete expired user facts in batches (runs on Celery beat).
+
+    Expired facts are already ignored by reads; this only keeps the table small.
+    Returns the number of deleted rows.
+    """
+    now = timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            UserFact.objects.filter(expires_at__lte=now).values_list("id", flat=True)[
+                :PURGE_BATCH_SIZE
+            ]
+        )
+        if not ids:
+            break
+        deleted, _ = UserFact.objects.filter(id__in=ids).delete()
+        total += deleted
+
+    logger.info(f"Purged {total} expired user facts")
+    return total
+
+
+async def _extract(text: str, max_chars: int):
+    try:
+        return await AIService().extract_user_context(text, max_chars=max_chars)
+    finally:
+        # async_to_sync runs a fresh event loop per call; release its client.
+        await close_openai_client()
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def extract_user_context(self, user_id: int) -> int:
+    """
+    Extract user facts from every message queued for ``user_id`` in one LLM call
+    and merge them into the user's facts with ``UserFact.upsert``.
+
+    The batch is removed from the queue only after the facts are stored; LLM
+    errors propagate so Celery retries the same batch.
+
+    Returns the number of messages handled.
+    """
+    batch = context_extraction_queue.peek(user_id)
+    if not batch:
+        return 0
+
+    lag = time.time() - min(item["ts"] for item in batch)
+    text = "\n\n".join(item["text"] for item in batch)
+    parsed = async_to_sync(_extract)(text, min(1000 * len(batch), 4000))
+
+    try:
+        parsed = json.loads(parsed) if isinstance(parsed, str) else parsed
+    except json.JSONDecodeError:
+        logger.debug(f"User {user_id} profile is invalid JSON: {parsed}")
+        parsed = None
+
+    if parsed and isinstance(parsed, dict):
+        UserFact.upsert(user_id, parsed, source="ai", **context_update_options())
+        get_redis().delete(UserContextStore.cache_key(user_id))
+    else:
+        logger.debug(f"User {user_id} has no profile: {parsed}")
+
+    context_extraction_queue.ack(user_id, batch)
+    context_extraction_queue.record_batch(len(batch), lag)
+    logger.info(
+        f"Extracted context for user {user_id}: {len(batch)} messages, lag {lag:.1f}s"
+    )
+
+    if context_extraction_queue.reschedule(user_id):
+        extract_user_context.apply_async(args=[user_id])
+    return len(batch)
@@ -0,0 +1,56 @@
+import asyncio
+from typing import List
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from django.conf import settings
+
+from apps.chat.services.ai import AIService
+from apps.chat.services.client import close_openai_client
+from apps.chat.services.pool import conversation_pool
+from apps.shared.utils.logger import logger
+
+CONCURRENCY = int(getattr(settings, "CHAT_CONVERSATION_POOL_CONCURRENCY", 10))
+LOCK_TIMEOUT = 300
+
+
+async def _create_conversations(count: int) -> List[str]:
+    service = AIService()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def create():
+        async with semaphore:
+            return await service.create_conversation()
+
+    try:
+        created = await asyncio.gather(*(create() for _ in range(count)))
+    finally:
+        await close_openai_client()
+    return [conversation_id for conversation_id in created if conversation_id]
+
+
+@shared_task(bind=True, max_retries=0)
+def replenish_conversation_pool(self) -> int:
+    """
+    Top the pool of pre-created OpenAI conversations up to its target size.
+
+    Runs on Celery beat and when a chat creation drains the pool below its low
+    water mark. Returns the number of conversations added.
+    """
+    token = conversation_pool.acquire_lock(LOCK_TIMEOUT)
+    if token is None:
+        return 0
+    try:
+        missing = conversation_pool.missing()
+        if not missing:
+            return 0
+        created = async_to_sync(_create_conversations)(missing)
+        conversation_pool.add(created)
+    finally:
+        conversation_pool.release_lock(token)
+
+    if len(created) < missing:
+        logger.warning(f"Created {len(created)} of {missing} pooled conversations")
+    else:
+        logger.info(f"Added {len(created)} conversations to the pool")
+    return len(created)
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from django.conf import settings
+
+from apps.chat.enums.file import FileStatus
+from apps.chat.models.chat import ChatResource
+from apps.chat.services.ai import AIService
+from apps.chat.services.client import close_openai_client
+from apps.shared.utils.logger import logger
+
+UPLOAD_CONCURRENCY = int(getattr(settings, "CHAT_UPLOAD_CONCURRENCY", 5))
+
+
+async def _create_files(resources: List[ChatResource]) -> Dict[int, Optional[str]]:
+    """Upload ``resources`` to OpenAI, at most ``UPLOAD_CONCURRENCY`` at a time."""
+    service = AIService()
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def create(resource: ChatResource):
+        async with semaphore:
+            try:
+                with resource.file.open("rb") as f:
+                    return resource.id, await service.create_file(file=f)
+            except OSError as e:
+                logger.warning(f"Failed to read chat resource {resource.id}: {e}")
+                return resource.id, None
+
+    try:
+        return dict(await asyncio.gather(*(create(r) for r in resources)))
+    finally:
+        # async_to_sync runs a fresh event loop per call; release its client.
+        await close_openai_client()
+
+
+def _upload(task, resource_ids: List[int]) -> None:
+    resources = list(
+        ChatResource.objects.filter(id__in=resource_ids, file_id__isnull=True)
+    )
+    if not resources:
+        return
+
+    uploaded = async_to_sync(_create_files)(resources)
+    for resource_id, file_id in uploaded.items():
+        if file_id:
+            ChatResource.objects.filter(id=resource_id).update(
+                file_id=file_id, status=FileStatus.UPLOADED
+            )
+    failed = [resource_id for resource_id, file_id in uploaded.items() if not file_id]
+    logger.info(f"Uploaded {len(uploaded) - len(failed)} chat resources to OpenAI")
+    if not failed:
+        return
+
+    if task.request.retries >= task.max_retries:
+        ChatResource.objects.filter(id__in=failed).update(status=FileStatus.FAILED)
+        logger.error(f"Giving up uploading chat resources {failed}")
+        return
+    # Only the failed ones are uploaded again; the others have a file_id now.
+    raise RuntimeError(f"Failed to upload chat resources {failed}")
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def upload_chat_resources(self, resource_ids: List[int]) -> None:
+    """
+    Upload stored ChatResources to OpenAI concurrently and mark them ``uploaded``.
+
+    Vector-store tasks of chats the files are attached to wait for this one;
+    files that still fail after the last retry are marked ``failed``.
+
+    Args:
+        resource_ids (List[int]): ChatResources to upload.
+    """
+    _upload(self, resource_ids)
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def upload_chat_resource(self, resource_id: int) -> None:
+    """
+    Upload one stored ChatResource; see ``upload_chat_resources``.
+
+    Args:
+        resource_id (int): ChatResource to upload.
+    """
+    _upload(self, [resource_id])
@@ -0,0 +1,182 @@
+from typing import List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from apps.chat.enums.file import FileStatus
+from apps.chat.models.chat import ChatResource, ChatRoom
+from apps.chat.services.ai import AIService
+from apps.chat.services.client import close_openai_client
+from apps.chat.services.events import send_to_chat
+from apps.shared.utils.logger import logger
+
+# Attached files still being uploaded are polled for up to five minutes.
+UPLOAD_WAIT_SECONDS = 3
+UPLOAD_WAIT_RETRIES = 100
+
+
+async def _create_store(chat_id: int) -> Optional[str]:
+    try:
+        return await AIService().create_vector_store(chat_id=chat_id)
+    finally:
+        await close_openai_client()
+
+
+async def _add_files(
+    chat: ChatRoom, file_ids: List[str]
+) -> Optional[Tuple[int, List[str]]]:
+    try:
+        return await AIService().add_file_to_vector_store(chat=chat, file_ids=file_ids)
+    finally:
+        # async_to_sync runs a fresh event loop per call; release its client.
+        await close_openai_client()
+
+
+async def _delete_store(vector_store_id: str) -> bool:
+    try:
+        return await AIService().delete_vector_store(vector_store_id)
+    finally:
+        await close_openai_client()
+
+
+def _load_chat(chat_id: int) -> Optional[ChatRoom]:
+    return (
+        ChatRoom.objects.filter(id=chat_id)
+        .only("id", "vector_store_id", "vector_store_file_count")
+        .first()
+    )
+
+
+def _ensure_vector_store(chat_id: int) -> Optional[ChatRoom]:
+    """
+    The chat with a vector store, creating the store on its first attachment.
+
+    The store is created without holding a row lock and then claimed with a
+    conditional UPDATE. If a concurrent task of the same chat claimed first,
+    the store created here is deleted and the winner's store is used.
+    """
+    chat = _load_chat(chat_id)
+    if chat is None or chat.vector_store_id:
+        return chat
+
+    vector_store_id = async_to_sync(_create_store)(chat_id)
+    if not vector_store_id:
+        raise RuntimeError(f"Failed to create a vector store for chat {chat_id}")
+
+    claimed = (
+        ChatRoom.objects.filter(id=chat_id)
+        .filter(Q(vector_store_id__isnull=True) | Q(vector_store_id=""))
+        .update(vector_store_id=vector_store_id)
+    )
+    if claimed:
+        chat.vector_store_id = vector_store_id
+        logger.info(f"Created vector store {vector_store_id} for chat {chat_id}")
+        return chat
+
+    if not async_to_sync(_delete_store)(vector_store_id):
+        logger.warning(
+            f"Orphaned vector store {vector_store_id} of chat {chat_id}; "
+            "it expires after 30 days of inactivity"
+        )
+    return _load_chat(chat_id)
+
+
+def _notify(chat: ChatRoom, ready: List[int], failed: List[int]) -> None:
+    send_to_chat(
+        chat.id,
+        {
+            "type": "file_ready",
+            "files": ready,
+            "failed": failed,
+            "vector_store_id": chat.vector_store_id,
+            "vector_store_file_count": chat.vector_store_file_count,
+        },
+    )
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def add_files_to_vector_store(
+    self, chat_id: int, resource_ids: List[int], waited: int = 0
+) -> None:
+    """
+    Add attached ChatResources to the chat's vector store in one file batch.
+
+    Waits for resources still being uploaded, creates the store on the chat's
+    first attachment and polls the batch until it is indexed. The resources are
+    then marked ``ready`` (or ``failed``) and a ``file_ready`` event tells the
+    chat's connections that file_search can use them.
+
+    Args:
+        chat_id (int): Chat room whose vector store receives the files.
+        resource_ids (List[int]): Attached ChatResource ids.
+        waited (int): Times the task was already re-queued to wait for uploads.
+            Kept apart from ``self.request.retries`` so waiting does not use up
+            the retry budget for real failures.
+    """
+    rows = list(
+        ChatResource.objects.filter(id__in=resource_ids).values_list(
+            "id", "file_id", "status"
+        )
+    )
+    pending = [rid for rid, _, status in rows if status == FileStatus.PENDING]
+    if pending:
+        if waited < UPLOAD_WAIT_RETRIES:
+            add_files_to_vector_store.apply_async(
+                args=[chat_id, resource_ids],
+                kwargs={"waited": waited + 1},
+                countdown=UPLOAD_WAIT_SECONDS,
+            )
+            return
+        logger.warning(
+            f"Gave up waiting for uploads {pending} of chat {chat_id}; "
+            "marking them failed"
+        )
+        ChatResource.objects.filter(id__in=pending, status=FileStatus.PENDING).update(
+            status=FileStatus.FAILED
+        )
+        rows = [
+            (rid, None if rid in pending else file_id, status)
+            for rid, file_id, status in rows
+        ]
+
+    files = {
+        file_id: rid
+        for rid, file_id, status in rows
+        if file_id and status != FileStatus.FAILED
+    }
+    failed = [rid for rid, file_id, _ in rows if file_id not in files]
+
+    chat = _ensure_vector_store(chat_id) if files else None
+    if chat is None:
+        chat = ChatRoom.objects.filter(id=chat_id).first()
+        if chat is not None:
+            _notify(chat, [], failed)
+        return
+
+    ChatResource.objects.filter(id__in=files.values()).update(
+        status=FileStatus.PROCESSING
+    )
+    result = async_to_sync(_add_files)(chat, list(files))
+    if result is None:
+        if self.request.retries >= self.max_retries:
+            ChatResource.objects.filter(id__in=files.values()).update(
+                status=FileStatus.FAILED
+            )
+            _notify(chat, [], list(files.values()) + failed)
+        raise RuntimeError(f"Failed to add files {list(files)} to chat {chat_id}")
+
+    ready_count, failed_file_ids = result
+    failed += [files.pop(file_id) for file_id in failed_file_ids if file_id in files]
+    ChatResource.objects.filter(id__in=files.values()).update(status=FileStatus.READY)
+    ChatResource.objects.filter(id__in=failed).update(status=FileStatus.FAILED)
+    ChatRoom.objects.filter(id=chat_id).update(
+        vector_store_file_count=Greatest(F("vector_store_file_count"), ready_count)
+    )
+    chat.vector_store_file_count = max(chat.vector_store_file_count, ready_count)
+    _notify(chat, list(files.values()), failed)
+    logger.info(
+        f"Added {len(files)} files to the vector store of chat {chat_id} "
+        f"({ready_count} ready, {len(failed)} failed)"
+    )
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.chat.models.chat import ChatResource, ChatRoom, Message
+from apps.users.models.users import User
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MessageListQueryCountTest(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="history@example.com", password="secret", username="history"
+        )
+        cls.chat = ChatRoom.objects.create(participant=cls.user)
+        for index in range(60):
+            message = Message.objects.create(
+                chat=cls.chat,
+                # Alternate user messages and AI answers (no sender).
+                sender=cls.user if index % 2 == 0 else None,
+                message=f"message {index}",
+            )
+            resource = ChatResource.objects.create(
+                user=cls.user,
+                file=ContentFile(f"content {index}".encode(), name=f"file_{index}.txt"),
+            )
+            message.file.add(resource)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("message", kwargs={"chat_id": self.chat.id})
+
+    def test_page_size_does_not_change_query_count(self):
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get(self.url, {"page_size": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 5)
+
+        with self.assertNumQueries(len(small_page)):
+            response = self.client.get(self.url, {"page_size": 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 50)
+        self.assertTrue(all(row["file"] for row in response.data["data"]))
+        self.assertTrue(any(row["sender"] for row in response.data["data"]))
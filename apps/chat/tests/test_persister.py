@@ -0,0 +1,128 @@
+from django.test import TransactionTestCase
+
+from apps.chat.models.chat import ChatRoom, Message
+from apps.chat.services.persister import (
+    ALIVE_PREFIX,
+    DEAD_LETTER_KEY,
+    JOURNAL_PREFIX,
+    MAX_ATTEMPTS,
+    MessagePersister,
+    PendingWrite,
+)
+from apps.shared.utils.redis import get_async_redis, get_redis
+from apps.users.models.users import User
+
+
+class MessagePersisterTest(TransactionTestCase):
+    # database_sync_to_async runs the writes on another thread, so the test data
+    # has to be committed rather than wrapped in a test transaction.
+
+    def setUp(self):
+        self._clear_redis()
+        self.user = User.objects.create_user(
+            email="persist@example.com", password="secret", username="persist"
+        )
+        self.chat = ChatRoom.objects.create(participant=self.user)
+
+    def tearDown(self):
+        self._clear_redis()
+
+    @staticmethod
+    def _clear_redis():
+        redis = get_redis()
+        for pattern in (f"{JOURNAL_PREFIX}*", f"{ALIVE_PREFIX}*"):
+            for key in redis.scan_iter(match=pattern):
+                redis.delete(key)
+        redis.delete(DEAD_LETTER_KEY)
+
+    async def test_flush_writes_messages_and_chat_counters(self):
+        persister = MessagePersister()
+        for index in range(3):
+            await persister.submit(
+                self.chat,
+                PendingWrite(
+                    chat_id=self.chat.id,
+                    text=f"answer {index}",
+                    openai_response_id=f"resp_{index}",
+                ),
+            )
+        await persister.submit(
+            self.chat, PendingWrite(chat_id=self.chat.id, title="Trip to Samarkand")
+        )
+        # Applied to the in-memory chat right away.
+        self.assertEqual(self.chat.ai_message_count, 3)
+        self.assertTrue(persister.has_pending(self.chat.id))
+
+        await persister.drain(self.chat.id)
+
+        chat = await ChatRoom.objects.aget(id=self.chat.id)
+        self.assertEqual(chat.ai_message_count, 3)
+        self.assertEqual(chat.name, "Trip to Samarkand")
+        self.assertEqual(await Message.objects.filter(chat=chat).acount(), 3)
+        self.assertFalse(persister.has_pending(self.chat.id))
+        self.assertEqual(await get_async_redis().llen(persister.journal_key), 0)
+        await persister.close()
+
+    async def test_recovers_journal_of_a_crashed_process(self):
+        crashed = MessagePersister()
+        alive = MessagePersister()
+        redis = get_async_redis()
+        await redis.rpush(
+            crashed.journal_key,
+            PendingWrite(
+                chat_id=self.chat.id, text="lost", openai_response_id="resp_lost"
+            ).dumps(),
+            # Already stored before the crash: must not be written twice.
+            PendingWrite(
+                chat_id=self.chat.id, text="saved", openai_response_id="resp_saved"
+            ).dumps(),
+        )
+        await Message.objects.acreate(
+            chat=self.chat, message="saved", openai_response_id="resp_saved"
+        )
+        await redis.rpush(
+            alive.journal_key, PendingWrite(chat_id=self.chat.id, text="busy").dumps()
+        )
+        await redis.set(alive.alive_key, 1, ex=30)
+
+        persister = MessagePersister()
+        await persister._recover()
+        self.assertTrue(persister.has_pending(self.chat.id))
+        await persister.flush()
+
+        texts = [
+            message.message
+            async for message in Message.objects.filter(chat=self.chat).order_by("id")
+        ]
+        self.assertEqual(texts, ["saved", "lost"])
+        self.assertEqual(await redis.llen(crashed.journal_key), 0)
+        self.assertEqual(await redis.llen(persister.journal_key), 0)
+        # The journal of a live process is left alone.
+        self.assertEqual(await redis.llen(alive.journal_key), 1)
+
+    async def test_poison_write_is_dead_lettered(self):
+        persister = MessagePersister()
+        good = PendingWrite(chat_id=self.chat.id, text="good", openai_response_id="ok")
+        # Longer than the column allows, so this write can never be stored.
+        poison = PendingWrite(
+            chat_id=self.chat.id, text="bad", openai_response_id="x" * 200
+        )
+        await persister.submit(self.chat, poison)
+        await persister.submit(self.chat, good)
+
+        await persister.flush()
+        # The good write is not held up by the poison one.
+        self.assertEqual(
+            await Message.objects.filter(openai_response_id="ok").acount(), 1
+        )
+
+        for _ in range(MAX_ATTEMPTS - 1):
+            await persister.flush()
+
+        redis = get_async_redis()
+        self.assertFalse(persister.has_pending(self.chat.id))
+        self.assertEqual(await redis.lrange(DEAD_LETTER_KEY, 0, -1), [poison.dumps()])
+        self.assertEqual(await redis.llen(persister.journal_key), 0)
+        chat = await ChatRoom.objects.aget(id=self.chat.id)
+        self.assertEqual(chat.ai_message_count, 1)
+        await persister.close()
@@ -0,0 +1,104 @@
+from django.test import SimpleTestCase, TestCase
+
+from apps.chat.models.chat import UserFact
+from apps.chat.services.prefilter import fact_prefilter
+from apps.users.models.users import User
+
+
+class FactPrefilterTest(SimpleTestCase):
+    def assertFacts(self, text, facts, should_extract):
+        result = fact_prefilter.classify(text)
+        self.assertEqual(result.facts, facts, text)
+        self.assertEqual(result.should_extract, should_extract, text)
+
+    def test_own_name(self):
+        self.assertFacts("My name is Bekzod.", {"name": "Bekzod"}, False)
+        self.assertFacts("Hi, my name is Ali", {"name": "Ali"}, False)
+        self.assertFacts("Меня зовут Олег.", {"name": "Олег"}, False)
+        self.assertFacts("Mening ismim Aziz", {"name": "Aziz"}, False)
+        self.assertFacts(
+            "My name is Ali. What is the capital of France?", {"name": "Ali"}, False
+        )
+
+    def test_name_in_question_or_quote_goes_to_llm(self):
+        self.assertFacts("Call me Ishmael is the first line of which novel?", {}, True)
+        self.assertFacts("What if my name is John?", {}, True)
+        self.assertFacts('He wrote "my name is Bond" in the book.', {}, True)
+        self.assertFacts("Call me a taxi? Just kidding, what time is it?", {}, False)
+
+    def test_own_age(self):
+        self.assertFacts("I'm 30 years old.", {"age": 30}, False)
+        self.assertFacts("Мне 25 лет", {"age": 25}, False)
+        self.assertFacts(
+            "Ismim Jahongir, 25 yoshdaman", {"name": "Jahongir", "age": 25}, False
+        )
+
+    def test_age_in_question_goes_to_llm(self):
+        self.assertFacts("I am 5 years old?", {}, True)
+
+    def test_own_contacts(self):
+        self.assertFacts(
+            "My phone is +998 90 123 45 67.", {"phone": "+998901234567"}, False
+        )
+        self.assertFacts("my email is ali.v@mail.uz", {"email": "ali.v@mail.uz"}, False)
+
+    def test_contacts_of_someone_else_go_to_llm(self):
+        self.assertFacts("Call +1 (555) 010-2030 for my dentist", {}, True)
+        self.assertFacts("Onamning raqami +998 90 123 45 67", {}, True)
+        self.assertFacts("Send the report to hr@acme.com", {}, True)
+        self.assertFacts("Is my email ali@mail.uz correct?", {}, True)
+
+    def test_lexicon_categories(self):
+        cases = {
+            "I live in Tashkent": "location",
+            "Я работаю врачом": "work",
+            "Men futbolni yaxshi ko'raman": "preferences",
+            "My goal is to pass IELTS": "goal",
+            "Follow me at @bekzod_dev": "social",
+        }
+        for text, category in cases.items():
+            result = fact_prefilter.classify(text)
+            self.assertIn(category, result.categories, text)
+            self.assertTrue(result.should_extract, text)
+
+    def test_small_talk_is_skipped(self):
+        self.assertFacts("What is the capital of Peru?", {}, False)
+        self.assertFacts("", {}, False)
+
+    def test_statements(self):
+        result = fact_prefilter.classify("My name is Bekzod, my email is b@mail.uz")
+        self.assertEqual(result.statements, {"name"})
+
+
+class UserFactSourceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="facts@example.com", password="secret", username="facts"
+        )
+
+    def fact(self, key):
+        return UserFact.objects.get(user=self.user, key=key)
+
+    def test_local_fact_keeps_ai_fact(self):
+        UserFact.upsert(self.user.id, {"email": "ai@mail.uz"}, source="ai")
+        UserFact.upsert(self.user.id, {"email": "local@mail.uz"}, source="local")
+        self.assertEqual(self.fact("email").value, "ai@mail.uz")
+        self.assertEqual(self.fact("email").source, "ai")
+
+    def test_own_statement_replaces_ai_fact(self):
+        UserFact.upsert(
+            self.user.id, {"name": "Aziz"}, source="ai", persistent_keys={"name"}
+        )
+        result = fact_prefilter.classify("My name is Bekzod.")
+        self.assertFalse(result.should_extract)
+
+        UserFact.upsert(
+            self.user.id,
+            result.facts,
+            source="local",
+            persistent_keys={"name"},
+            statements=result.statements,
+        )
+        self.assertEqual(self.fact("name").value, "Bekzod")
+        self.assertEqual(self.fact("name").source, "local")
@@ -1,12 +1,29 @@
 from django.urls import re_path, path
 
 from apps.chat.consumers.chat import ChatConsumer
-from apps.chat.views.chat import ChatRoomList, MessageList, ChatResourceView
+from apps.chat.views.chat import (
+    ChatRoomList,
+    MessageList,
+    ChatResourceView,
+    ChatResourceBatchView,
+)
+from apps.chat.views.stats import AIClientStatsView, ContextExtractionStatsView
 
 urlpatterns = [
     path("chats/", ChatRoomList.as_view(), name="chat"),
     path("resource/", ChatResourceView.as_view(), name="chat-resource"),
+    path(
+        "resource/batch/",
+        ChatResourceBatchView.as_view(),
+        name="chat-resource-batch",
+    ),
     path("messages/<int:chat_id>/", MessageList.as_view(), name="message"),
+    path("stats/ai-client/", AIClientStatsView.as_view(), name="ai-client-stats"),
+    path(
+        "stats/context-extraction/",
+        ContextExtractionStatsView.as_view(),
+        name="context-extraction-stats",
+    ),
 ]
 
 websocket_urlpatterns = [
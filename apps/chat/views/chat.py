@@ -1,31 +1,41 @@
 import os
 
-from asgiref.sync import async_to_sync
-from django.db import transaction
+from adrf.views import APIView
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
+from apps.chat.enums.file import FileStatus
 from apps.chat.models.chat import ChatRoom
 from apps.chat.serializers.chat import (
     ChatRoomSerializer,
-    MessageSerializer,
+    MessageHistorySerializer,
     ChatResourceSerializer,
 )
 from apps.chat.services.ai import AIService
-from apps.shared.exceptions.http404 import get_object_or_404
-from apps.shared.pagination.custom import CustomPagination
+from apps.chat.services.pool import conversation_pool
+from apps.chat.services.resource import store_resource
+from apps.chat.tasks.pool import replenish_conversation_pool
+from apps.chat.tasks.resource import upload_chat_resources
+from apps.shared.exceptions.http404 import aget_object_or_404
+from apps.shared.pagination.keyset import KeysetPagination
+from apps.shared.serializers.dynamic import parse_fields
 from apps.shared.utils.logger import logger
+from apps.shared.utils.upload import ValidatingUploadHandler
 from core.settings import SUPPORTED_FILE_FORMATS, SUPPORTED_FILE_SIZE
 
+MAX_BATCH_FILES = int(getattr(settings, "CHAT_UPLOAD_MAX_FILES", 20))
+
 
 class ChatRoomList(APIView):
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
+    ordering = ("-last_message_at", "-id")
 
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
             return Response(
@@ -38,23 +48,31 @@ class ChatRoomList(APIView):
             )
 
         try:
-            with transaction.atomic():
-                chat_room = serializer.save(participant=request.user)
-
-                conversation_id = async_to_sync(AIService().create_conversation)()
-                vector_store_id = async_to_sync(AIService().create_vector_store)(
-                    chat_id=chat_room.id
-                )
+            # A pre-created conversation makes this a single insert; no OpenAI
+            # call happens while a transaction is open. The vector store is
+            # created on the chat's first attachment.
+            conversation_id = await conversation_pool.claim()
+            if await conversation_pool.needs_refill():
+                try:
+                    await sync_to_async(
+                        replenish_conversation_pool.delay, thread_sensitive=False
+                    )()
+                except Exception as e:
+                    logger.warning(f"Failed to schedule conversation pool refill: {e}")
+            if not conversation_id:
+                conversation_id = await AIService().create_conversation()
 
-                chat_room.conversation_id = conversation_id
-                chat_room.vector_store_id = vector_store_id
-                chat_room.save(update_fields=["conversation_id", "vector_store_id"])
+            chat_room = await ChatRoom.objects.acreate(
+                participant=request.user,
+                conversation_id=conversation_id,
+                **serializer.validated_data,
+            )
 
         except Exception as e:
             return Response(
                 {
                     "success": False,
-                    "message": "Failed to create AI conversation or vector store.",
+                    "message": "Failed to create AI conversation.",
                     "error": str(e),
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -69,37 +87,59 @@ class ChatRoomList(APIView):
             status=status.HTTP_201_CREATED,
         )
 
-    def get(self, request):
+    async def get(self, request):
         sender_user = request.user
         queryset = ChatRoom.objects.filter(participant=sender_user)
         paginator = self.pagination_class()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        paginated_queryset = await paginator.apaginate_queryset(
+            queryset, request, view=self
+        )
         serializer = self.serializer_class(paginated_queryset, many=True)
         return paginator.get_paginated_response(serializer.data)
 
 
 class MessageList(APIView):
-    serializer_class = MessageSerializer
+    serializer_class = MessageHistorySerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
+    ordering = ("created_at", "id")
+
+    async def get(self, request, chat_id):
+        chat_room = await aget_object_or_404(
+            ChatRoom, id=chat_id, participant=request.user
+        )
+        fields = parse_fields(request.query_params.get("fields"))
+
+        queryset = chat_room.messages.all()
+        if fields is None or "sender" in fields:
+            queryset = queryset.select_related("sender")
+        if fields is None or "file" in fields:
+            queryset = queryset.prefetch_related("file")
 
-    def get(self, request, chat_id):
-        chat_room = get_object_or_404(ChatRoom, id=chat_id, participant=request.user)
-        queryset = chat_room.messages.order_by("created_at").all()
         paginator = self.pagination_class()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        paginated_queryset = await paginator.apaginate_queryset(
+            queryset, request, view=self
+        )
         serializer = self.serializer_class(
-            paginated_queryset, many=True, context={"request": request}
+            paginated_queryset,
+            many=True,
+            fields=fields,
+            context={"request": request},
+        )
+        return paginator.get_paginated_response(
+            serializer.data, extra={"chat": ChatRoomSerializer(chat_room).data}
         )
-        return paginator.get_paginated_response(serializer.data)
 
 
 class ChatResourceView(APIView):
     serializer_class = ChatResourceSerializer
     permission_classes = [IsAuthenticated]
 
-    def post(self, request):
-        uploaded_file = request.FILES.get("file")
+    async def post(self, request):
+        # Parsing the multipart body reads and spools the upload; keep it off the
+        # event loop.
+        files = await sync_to_async(lambda: request.FILES)()
+        uploaded_file = files.get("file")
         if not uploaded_file:
             return Response(
                 {"success": False, "message": "File is required."},
@@ -139,35 +179,117 @@ class ChatResourceView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # The OpenAI upload and indexing run on Celery; the resource is returned
+        # as ``pending`` and chats get a ``file_ready`` event once it is usable.
+        # A file the user already uploaded is not stored or uploaded again.
         try:
-            with transaction.atomic():
-                chat_resource = serializer.save(user=request.user)
+            chat_resource, created = await sync_to_async(store_resource)(
+                request.user, serializer.validated_data["file"]
+            )
+        except Exception as e:
+            return Response(
+                {
+                    "success": False,
+                    "message": "Failed to store the file.",
+                    "error": str(e),
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": (
+                    "File uploaded; processing started."
+                    if created
+                    else "File was uploaded before; reusing it."
+                ),
+                "data": self.serializer_class(chat_resource).data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class ChatResourceBatchView(APIView):
+    """
+    Upload several files in one multipart request (``files`` fields).
+
+    Unsupported or oversized files are skipped while the body is parsed and
+    reported under ``rejected``. The accepted ones are uploaded to OpenAI by a
+    single Celery task, concurrently; attaching them to one message adds them
+    all to the chat's vector store in one file batch.
+    """
+
+    serializer_class = ChatResourceSerializer
+    permission_classes = [IsAuthenticated]
 
-                file_path = chat_resource.file.path
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"File not found on disk: {file_path}")
+    async def post(self, request):
+        validator = ValidatingUploadHandler(
+            request._request,
+            extensions=SUPPORTED_FILE_FORMATS,
+            max_size=SUPPORTED_FILE_SIZE,
+        )
+        # Must be in place before the body is parsed.
+        request.upload_handlers.insert(0, validator)
 
-                with open(file_path, "rb") as f:
-                    file_id = async_to_sync(AIService().create_file)(file=f)
+        # Parsing runs the upload handlers over the whole body; keep it off the
+        # event loop.
+        files = await sync_to_async(lambda: request.FILES)()
+        uploaded_files = files.getlist("files")
+        if len(uploaded_files) > MAX_BATCH_FILES:
+            return Response(
+                {
+                    "success": False,
+                    "message": f"Too many files. At most {MAX_BATCH_FILES} can be uploaded at once.",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not uploaded_files:
+            return Response(
+                {
+                    "success": False,
+                    "message": "No supported file was uploaded.",
+                    "rejected": validator.rejected,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-                chat_resource.file_id = file_id
-                chat_resource.save(update_fields=["file_id"])
+        def _store():
+            return [
+                store_resource(request.user, uploaded_file, upload=False)
+                for uploaded_file in uploaded_files
+            ]
 
+        try:
+            stored = await sync_to_async(_store)()
+            pending = [
+                resource.id
+                for resource, _ in stored
+                if resource.status == FileStatus.PENDING
+            ]
+            if pending:
+                await sync_to_async(
+                    upload_chat_resources.delay, thread_sensitive=False
+                )(pending)
         except Exception as e:
             return Response(
                 {
                     "success": False,
-                    "message": "Failed to upload file to AI.",
+                    "message": "Failed to store the files.",
                     "error": str(e),
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        created = any(is_new for _, is_new in stored)
         return Response(
             {
                 "success": True,
-                "message": "File uploaded and linked successfully.",
-                "data": self.serializer_class(chat_resource).data,
+                "message": f"{len(stored)} files uploaded; processing started.",
+                "data": self.serializer_class(
+                    [resource for resource, _ in stored], many=True
+                ).data,
+                "rejected": validator.rejected,
             },
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
         )
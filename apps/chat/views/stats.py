@@ -0,0 +1,32 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.chat.services.client import openai_pool_stats
+from apps.chat.services.extraction import context_extraction_queue
+
+
+class AIClientStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "success": True,
+                "message": "OpenAI client pool statistics for this worker.",
+                "data": openai_pool_stats(),
+            }
+        )
+
+
+class ContextExtractionStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "success": True,
+                "message": "User-context extraction batch size and lag.",
+                "data": context_extraction_queue.stats(),
+            }
+        )
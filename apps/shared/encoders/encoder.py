@@ -4,3 +4,9 @@ import json
 class PrettyJSONEncoder(json.JSONEncoder):
     def __init__(self, *args, indent, sort_keys, **kwargs):
         super().__init__(*args, indent=4, sort_keys=True, **kwargs)
+
+
+class CompactJSONEncoder(json.JSONEncoder):
+    def __init__(self, *args, **kwargs):
+        kwargs.update(separators=(",", ":"), ensure_ascii=False)
+        super().__init__(*args, **kwargs)
@@ -32,3 +32,12 @@ def get_object_or_404(object_class, *args, **kwargs):
         # Build filters from kwargs if available, otherwise use args
         filters = kwargs if kwargs else {"args": args}
         raise Http404Exception(object_name=object_class.__name__, filters=filters)
+
+
+async def aget_object_or_404(object_class, *args, **kwargs):
+    """Async ``get_object_or_404`` for async views."""
+    try:
+        return await object_class.objects.aget(*args, **kwargs)
+    except (object_class.DoesNotExist, ValueError, TypeError, ValidationError):
+        filters = kwargs if kwargs else {"args": args}
+        raise Http404Exception(object_name=object_class.__name__, filters=filters)
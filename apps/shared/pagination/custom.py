@@ -6,7 +6,8 @@ class CustomPagination(PageNumberPagination):
     page_size_query_param = "page_size"
     page_size = 5
 
-    def get_paginated_response(self, data):
+    def get_paginated_response(self, data, extra=None):
+        """``extra`` adds envelope keys (e.g. the parent object) before ``data``."""
         paginator = self.page.paginator
         return Response(
             {
@@ -20,6 +21,7 @@ class CustomPagination(PageNumberPagination):
                 "total_pages": paginator.num_pages,
                 "page_size": self.get_page_size(self.request),
                 "current_page": self.page.number,
+                **(extra or {}),
                 "data": data,
             }
         )
@@ -0,0 +1,207 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination over a unique, composite ordering.
+
+    The view declares ``ordering``, e.g. ``("created_at", "id")`` or
+    ``("-last_message_at", "-id")``; the last field must be unique. Pages are
+    fetched with ``WHERE (a, b) > (x, y)``-style filters instead of ``OFFSET`` and
+    no ``COUNT(*)`` runs unless the client asks for it with ``?with_count=true``.
+
+    ``links.next`` follows the ordering, ``links.previous`` goes back.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "with_count"
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self):
+        self.request = None
+        self.ordering: Tuple[str, ...] = ()
+        self.page: List[Any] = []
+        self.has_next = False
+        self.has_previous = False
+        self.total_items: Optional[int] = None
+
+    # ---------------------- cursor encoding ----------------------
+    @staticmethod
+    def _encode(values: Sequence[Any], reverse: bool) -> str:
+        payload = json.dumps({"v": list(values), "r": int(reverse)}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor: str, model) -> Tuple[List[Any], bool]:
+        """
+        Cursor values, each converted to its ordering field's type, and direction.
+
+        A malformed or tampered cursor is a client error (400), never an ORM one.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = list(payload["v"])
+            if len(values) != len(self.ordering):
+                raise ValueError("cursor does not match ordering")
+            values = [
+                self._to_python(model, field, value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return values, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise ValidationError(
+                {self.cursor_query_param: self.invalid_cursor_message}
+            )
+
+    def _to_python(self, model, field: str, value: Any) -> Any:
+        try:
+            model_field = model._meta.get_field(field.lstrip("-"))
+        except FieldDoesNotExist:
+            return value
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError(f"invalid cursor value for {field}")
+        try:
+            value = model_field.to_python(value)
+            # Range checks, e.g. an id that does not fit the column.
+            model_field.run_validators(value)
+            return value
+        except DjangoValidationError:
+            raise ValueError(f"invalid cursor value for {field}")
+
+    def _row_values(self, obj) -> List[Any]:
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            values.append(value)
+        return values
+
+    # ---------------------- query building ----------------------
+    def _beyond(self, values: Sequence[Any], reverse: bool) -> Q:
+        """Rows strictly after ``values`` in the ordering (before, if ``reverse``)."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            lookup = "lt" if descending != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _order_by(self, reverse: bool) -> List[str]:
+        if not reverse:
+            return list(self.ordering)
+        return [f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering]
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, 0))
+        except (TypeError, ValueError):
+            size = 0
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def _page_query(self, queryset, request, view) -> Tuple[Any, int, bool, bool]:
+        """The page's queryset (one row beyond the page), size, cursor and direction."""
+        self.request = request
+        self.ordering = tuple(getattr(view, "ordering", None) or ("-created_at", "id"))
+        page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            values, reverse = self._decode(cursor, queryset.model)
+            queryset = queryset.filter(self._beyond(values, reverse))
+
+        queryset = queryset.order_by(*self._order_by(reverse))[: page_size + 1]
+        return queryset, page_size, bool(cursor), reverse
+
+    def _wants_count(self, request) -> bool:
+        with_count = request.query_params.get(self.count_query_param, "")
+        return with_count.lower() in ("1", "true")
+
+    def _set_page(
+        self, rows: List[Any], page_size: int, has_cursor: bool, reverse: bool
+    ) -> List[Any]:
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = has_cursor
+
+        self.page = rows
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._wants_count(request):
+            self.total_items = queryset.count()
+        page_query, *page = self._page_query(queryset, request, view)
+        return self._set_page(list(page_query), *page)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, on the async ORM."""
+        if self._wants_count(request):
+            self.total_items = await queryset.acount()
+        page_query, *page = self._page_query(queryset, request, view)
+        return self._set_page([row async for row in page_query], *page)
+
+    # ---------------------- response ----------------------
+    def _link(self, values: Sequence[Any], reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self._encode(values, reverse)
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Came back past the first row: the next page starts from the beginning.
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self._link(self._row_values(self.page[-1]), reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self._row_values(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data, extra: Optional[Dict[str, Any]] = None):
+        """``extra`` adds envelope keys (e.g. the parent object) before ``data``."""
+        body = {
+            "success": True,
+            "message": "Data fetched successfully.",
+            "links": {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+            },
+            "page_size": self.get_page_size(self.request),
+        }
+        if self.total_items is not None:
+            body["total_items"] = self.total_items
+        body.update(extra or {})
+        body["data"] = data
+        return Response(body)
@@ -0,0 +1,26 @@
+from typing import Iterable, Optional, Set
+
+from rest_framework import serializers
+
+
+def parse_fields(value: Optional[str]) -> Optional[Set[str]]:
+    """Parse a ``?fields=a,b,c`` query value; ``None`` means all fields."""
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(",") if name.strip()}
+    return fields or None
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that only renders the fields passed as ``fields``.
+
+    Example:
+        MessageHistorySerializer(queryset, many=True, fields={"id", "message"})
+    """
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
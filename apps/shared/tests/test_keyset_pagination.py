@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.chat.models.chat import ChatRoom
+from apps.shared.pagination.keyset import KeysetPagination
+from apps.users.models.users import User
+
+
+class ChatListView:
+    ordering = ("-last_message_at", "-id")
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(
+            email="keyset@example.com", password="secret", username="keyset"
+        )
+        now = timezone.now()
+        cls.chats = [
+            ChatRoom.objects.create(
+                participant=user, last_message_at=now - timedelta(minutes=index)
+            )
+            for index in range(7)
+        ]
+        # Newest first, as the view orders them.
+        cls.ids = [chat.id for chat in cls.chats]
+
+    def paginate(self, cursor=None, page_size=3):
+        params = {"page_size": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        request = Request(APIRequestFactory().get("/chats/", params))
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(
+            ChatRoom.objects.all(), request, view=ChatListView()
+        )
+        return paginator, [row.id for row in rows]
+
+    @staticmethod
+    def cursor(link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    @staticmethod
+    def encode(values, reverse=False):
+        payload = json.dumps({"v": values, "r": int(reverse)})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def test_forward(self):
+        paginator, ids = self.paginate()
+        self.assertEqual(ids, self.ids[:3])
+        self.assertIsNone(paginator.get_previous_link())
+
+        paginator, ids = self.paginate(self.cursor(paginator.get_next_link()))
+        self.assertEqual(ids, self.ids[3:6])
+
+        paginator, ids = self.paginate(self.cursor(paginator.get_next_link()))
+        self.assertEqual(ids, self.ids[6:])
+        self.assertIsNone(paginator.get_next_link())
+
+    def test_reverse(self):
+        paginator, _ = self.paginate()
+        paginator, ids = self.paginate(self.cursor(paginator.get_next_link()))
+        self.assertEqual(ids, self.ids[3:6])
+
+        paginator, ids = self.paginate(self.cursor(paginator.get_previous_link()))
+        self.assertEqual(ids, self.ids[:3])
+        self.assertIsNone(paginator.get_previous_link())
+
+    def test_invalid_cursor(self):
+        last_message_at = self.chats[2].last_message_at.isoformat()
+        cursors = {
+            "not base64": "!!!",
+            "not json": base64.urlsafe_b64encode(b"nope").decode(),
+            "wrong length": self.encode([last_message_at]),
+            "string id": self.encode([last_message_at, "abc"]),
+            "id out of range": self.encode([last_message_at, 2**70]),
+            "bad timestamp": self.encode(["yesterday", self.ids[2]]),
+            "null value": self.encode([None, self.ids[2]]),
+        }
+        for case, cursor in cursors.items():
+            with self.subTest(case), self.assertRaises(ValidationError):
+                self.paginate(cursor)
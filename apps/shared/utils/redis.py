@@ -0,0 +1,41 @@
+import asyncio
+import weakref
+from typing import Optional
+
+from django.conf import settings
+from redis import Redis as SyncRedis
+from redis.asyncio import Redis
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_redis_url() -> str:
+    return settings.CACHES["default"]["LOCATION"]
+
+
+def get_async_redis() -> Redis:
+    """
+    Return an asyncio Redis client bound to the running event loop.
+
+    Clients are cached per loop because redis.asyncio connections cannot be
+    shared between event loops.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = Redis.from_url(get_redis_url(), decode_responses=True)
+        _clients[loop] = client
+    return client
+
+
+_sync_client: Optional[SyncRedis] = None
+
+
+def get_redis() -> SyncRedis:
+    """Return the process-wide synchronous Redis client (Celery tasks, commands)."""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = SyncRedis.from_url(get_redis_url(), decode_responses=True)
+    return _sync_client
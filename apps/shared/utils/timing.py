@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict
+
+
+class StageTimer:
+    """
+    Collect wall-clock durations (in milliseconds) of named pipeline stages.
+
+    Example:
+        timer = StageTimer()
+        with timer.stage("save"):
+            ...
+        context = await timer.track("context", fetch_context())
+        logger.info(f"Pipeline timings: {timer}")
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @staticmethod
+    def _ms(since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self._ms(started)
+
+    async def track(self, name: str, awaitable: Awaitable) -> Any:
+        with self.stage(name):
+            return await awaitable
+
+    def mark(self, name: str) -> None:
+        """Record the time elapsed since the timer was created."""
+        self.stages[name] = self._ms(self._started)
+
+    def __str__(self) -> str:
+        stages = " ".join(f"{name}={ms}ms" for name, ms in self.stages.items())
+        return f"{stages} total={self._ms(self._started)}ms"
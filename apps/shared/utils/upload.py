@@ -0,0 +1,96 @@
+import hashlib
+import os
+from typing import Dict, Iterable, List, Optional
+
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    MemoryFileUploadHandler,
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingUploadMixin:
+    """
+    Compute the SHA-256 of an upload while it is streamed in.
+
+    The hex digest is set as ``sha256`` on the resulting ``UploadedFile`` so the
+    content never has to be read a second time to deduplicate it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self._sha256 = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    Skip files with an unsupported extension or over ``max_size`` while they
+    are streamed in, before they are buffered by the handlers after it.
+
+    Installed per view in front of ``request.upload_handlers``; skipped files
+    are listed in ``rejected``.
+    """
+
+    def __init__(
+        self,
+        request=None,
+        extensions: Iterable[str] = (),
+        max_size: Optional[int] = None,
+    ):
+        super().__init__(request)
+        self.extensions = {ext.lower() for ext in extensions}
+        self.max_size = max_size
+        self.rejected: List[Dict[str, str]] = []
+        self._received = 0
+
+    def _reject(self, reason: str) -> None:
+        self.rejected.append({"name": self.file_name, "reason": reason})
+        raise SkipFile()
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args):
+        super().new_file(field_name, file_name, content_type, content_length, *args)
+        self._received = 0
+        extension = os.path.splitext(file_name or "")[1].lower()
+        if self.extensions and extension not in self.extensions:
+            self._reject("unsupported_format")
+        if self.max_size and content_length and content_length > self.max_size:
+            self._reject("too_large")
+
+    def receive_data_chunk(self, raw_data, start):
+        self._received += len(raw_data)
+        if self.max_size and self._received > self.max_size:
+            self._reject("too_large")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def file_sha256(file) -> str:
+    """SHA-256 of ``file``: the digest taken during upload, else read in chunks."""
+    digest = getattr(file, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
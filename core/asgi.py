@@ -19,10 +19,12 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 from apps.chat.urls import websocket_urlpatterns
 from apps.shared.middlewares.websocket import JWTAuthMiddleware
+from core.lifespan import lifespan_application
 
 application = ProtocolTypeRouter(
     {
         "http": asgi_application,
         "websocket": JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+        "lifespan": lifespan_application,
     }
 )
@@ -1,9 +1,7 @@
 import os
 
 from celery import Celery
-
-# from celery.schedules import crontab
-
+from celery.schedules import crontab
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
@@ -12,3 +10,14 @@ app = Celery("core")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    "purge-expired-user-facts": {
+        "task": "apps.chat.tasks.context.purge_expired_user_facts",
+        "schedule": crontab(minute=15),
+    },
+    "replenish-conversation-pool": {
+        "task": "apps.chat.tasks.pool.replenish_conversation_pool",
+        "schedule": crontab(),
+    },
+}
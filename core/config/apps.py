@@ -10,6 +10,7 @@ THIRD_PARTY_APPS = [
     "corsheaders",
     "rosetta",
     "rest_framework",
+    "adrf",
     "drf_spectacular",
     "drf_spectacular_sidecar",
     "channels",
@@ -0,0 +1,32 @@
+"""
+ASGI lifespan handler.
+
+Warms up shared outbound clients when the server starts and closes them on
+shutdown so pooled connections are released cleanly. The write-behind message
+persister is started with the server and flushed before it stops.
+"""
+
+from apps.chat.services.client import close_openai_client, warm_up_openai_client
+from apps.chat.services.persister import close_message_persister, get_message_persister
+from apps.shared.utils.logger import logger
+
+
+async def lifespan_application(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await warm_up_openai_client()
+            # Adopts pending writes left behind by a previous process.
+            get_message_persister().start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                await close_message_persister()
+            except Exception as e:
+                logger.warning(f"Failed to flush pending chat writes on shutdown: {e}")
+            try:
+                await close_openai_client()
+            except Exception as e:
+                logger.warning(f"Failed to close OpenAI client on shutdown: {e}")
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -127,6 +127,12 @@ AUTH_USER_MODEL = "users.User"
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)
+)
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 30))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() in ["true", "1"]
 
 CHAT_PERSISTENT_KEYS = {
     "name",
@@ -158,6 +164,38 @@ CHAT_PERSISTENT_KEYS = {
 
 CHAT_DEFAULT_TTL_DAYS = 7
 
+CHAT_CHUNK_SIZE = 512  # characters buffered before an ai_chunk frame is flushed
+
+CHAT_CHUNK_MAX_LATENCY_MS = 30  # max time a delta waits in the buffer
+
+CHAT_DIRECT_STREAMING = True  # write to the own socket, broadcast only to other tabs
+
+CHAT_QUEUE_MAX_SIZE = 5  # prompts a connection may queue behind the running answer
+
+CHAT_STREAM_REPLAY_TTL = 300  # seconds an answer's frames stay available for resume
+
+CHAT_FILE_READY_TIMEOUT = 60  # seconds an answer waits for its attachments to index
+
+CHAT_PERSIST_FLUSH_MS = 200  # AI messages are written in batches at most this often
+
+CHAT_PERSIST_BATCH_SIZE = 100  # or as soon as this many writes are waiting
+
+CHAT_PERSIST_MAX_ATTEMPTS = 3  # a write failing this often alone is dead-lettered
+
+CHAT_CONTEXT_CACHE_TTL = 60 * 60  # seconds a user's context stays in Redis
+
+CHAT_CONTEXT_LOCAL_TTL = 30  # seconds a process may serve its own cached copy
+
+CHAT_EXTRACT_WINDOW_SECONDS = 10  # a user's messages within this share one extraction
+
+CHAT_EXTRACT_DEDUPE_SECONDS = 600  # identical messages are extracted once per window
+
+CHAT_TITLE_LLM_FALLBACK = False  # ask the LLM for a title when no local one is found
+
+CHAT_CONVERSATION_POOL_SIZE = 50  # OpenAI conversations created ahead of new chats
+
+CHAT_CONVERSATION_POOL_LOW_WATER = 10  # refill as soon as fewer are left
+
 CHAT_TTL_OVERRIDES = {key: CHAT_DEFAULT_TTL_DAYS for key in CHAT_PERSISTENT_KEYS}
 
 CHAT_PRIORITY_MAP = {
@@ -192,4 +230,14 @@ SUPPORTED_FILE_FORMATS = [".txt", ".pdf", ".doc", ".docx", ".pptx"]
 
 SUPPORTED_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 
+CHAT_UPLOAD_MAX_FILES = 20  # files accepted by one batch upload request
+
+CHAT_UPLOAD_CONCURRENCY = 5  # OpenAI uploads a Celery task runs at once
+
+# Uploads are hashed while they stream in, for content deduplication.
+FILE_UPLOAD_HANDLERS = [
+    "apps.shared.utils.upload.HashingMemoryFileUploadHandler",
+    "apps.shared.utils.upload.HashingTemporaryFileUploadHandler",
+]
+
 X_FRAME_OPTIONS = "ALLOW-FROM *"